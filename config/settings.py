@@ -1,19 +1,32 @@
 import os
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Считываем переменные окружения один раз при импорте модуля
+_BOT_TOKEN = os.getenv("BOT_TOKEN")
+_DATABASE_PATH = os.getenv("DATABASE_PATH")
+_LOG_LEVEL = os.getenv("LOG_LEVEL")
+
+if not _BOT_TOKEN:
+    raise ValueError("BOT_TOKEN не установлен в переменных окружения")
+if not _DATABASE_PATH:
+    raise ValueError("DATABASE_PATH не установлен")
+if not _LOG_LEVEL:
+    raise ValueError("LOG_LEVEL не установлен")
+
+
+@dataclass(frozen=True)
 class Settings:
-    def __init__(self):
-        self.bot_token = os.getenv("BOT_TOKEN")
-        self.database_path = os.getenv("DATABASE_PATH")
-        self.log_level = os.getenv("LOG_LEVEL")
+    bot_token: str
+    database_path: str
+    log_level: str
 
-        if not self.bot_token:
-            raise ValueError("BOT_TOKEN не установлен в переменных окружения")
-        if not self.database_path:
-            raise ValueError("DATABASE_PATH не установлен")
-        if not self.log_level:
-            raise ValueError("LOG_LEVEL не установлен")
 
-settings = Settings()
\ No newline at end of file
+settings = Settings(
+    bot_token=_BOT_TOKEN,
+    database_path=_DATABASE_PATH,
+    # Приводим к верхнему регистру один раз при загрузке конфигурации
+    log_level=_LOG_LEVEL.upper(),
+)
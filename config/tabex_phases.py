@@ -4,10 +4,17 @@
 Определяет медицинские параметры каждой фазы лечения:
 интервалы приёма, количество таблеток, персонажей и особые события.
 """
-from dataclasses import dataclass
+import re
+import types
+from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Dict, Optional, Tuple
 from enum import Enum
 
+# Допустимое время первого приёма в формате "HH:MM" (00:00 - 23:59)
+_TIME_RE = re.compile(r'^([01]\d|2[0-3]):([0-5]\d)$')
+
 
 class PhaseType(Enum):
     """Типы фаз лечения."""
@@ -18,7 +25,7 @@ class PhaseType(Enum):
     COMPLETION = "completion" # Завершающая фаза
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TabexPhaseConfig:
     """
     Конфигурация одной фазы лечения Табекс.
@@ -32,6 +39,7 @@ class TabexPhaseConfig:
         phase_type: Тип фазы лечения
         special_events: Особые события в эти дни
         description: Описание фазы
+        days: Множество дней фазы (вычисляется из day_range)
     """
     phase_number: int
     day_range: Tuple[int, int]
@@ -41,18 +49,23 @@ class TabexPhaseConfig:
     phase_type: PhaseType
     special_events: Dict[int, str]
     description: str
-    
+    days: frozenset = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """Предрассчитывает множество дней фазы для быстрой проверки."""
+        object.__setattr__(self, 'days', frozenset(range(self.day_range[0], self.day_range[1] + 1)))
+
     def is_day_in_phase(self, day: int) -> bool:
         """Проверяет, входит ли день в эту фазу."""
-        return self.day_range[0] <= day <= self.day_range[1]
+        return day in self.days
     
     def get_special_event_for_day(self, day: int) -> Optional[str]:
         """Возвращает особое событие для дня, если есть."""
         return self.special_events.get(day)
 
 
-# Конфигурация всех фаз лечения Табекс
-TABEX_PHASES_CONFIG: Dict[int, TabexPhaseConfig] = {
+# Конфигурация всех фаз лечения Табекс (только для чтения)
+TABEX_PHASES_CONFIG: types.MappingProxyType = types.MappingProxyType({
     1: TabexPhaseConfig(
         phase_number=1,
         day_range=(1, 3),
@@ -133,7 +146,47 @@ TABEX_PHASES_CONFIG: Dict[int, TabexPhaseConfig] = {
                    "1-2 таблетки в день по потребности. "
                    "Подготовка к финальной аудиенции."
     )
-}
+})
+
+
+@lru_cache(maxsize=256)
+def _dose_time_slots(doses_per_day: int, interval_hours: float, start_time: str) -> Tuple[str, ...]:
+    """
+    Рассчитывает временные слоты приёма для параметров фазы.
+
+    Результат мемоизируется: комбинаций (доз, интервал, время старта)
+    немного, а расчёт вызывается на каждое построение расписания.
+
+    Args:
+        doses_per_day: Количество таблеток в день
+        interval_hours: Интервал между приёмами в часах
+        start_time: Время первого приёма в формате "HH:MM"
+
+    Returns:
+        Кортеж времён приёма в формате ("HH:MM", ...)
+    """
+    # Валидируем время регулярным выражением вместо try/except вокруг
+    # strptime: некорректный ввод - не исключительная ситуация
+    match = _TIME_RE.match(start_time)
+    if not match:
+        # Для некорректного времени возвращаем базовые слоты
+        return (start_time,)
+
+    # Строим datetime напрямую из разобранных групп, минуя strptime
+    current_time = datetime(1900, 1, 1, int(match.group(1)), int(match.group(2)))
+
+    # Генерируем все слоты на день
+    slots = []
+    interval_minutes = int(interval_hours * 60)
+
+    for i in range(doses_per_day):
+        slots.append(current_time.strftime("%H:%M"))
+
+        # Добавляем интервал для следующего слота
+        if i < doses_per_day - 1:  # Не добавляем интервал после последней дозы
+            current_time += timedelta(minutes=interval_minutes)
+
+    return tuple(slots)
 
 
 class TabexPhaseManager:
@@ -147,21 +200,37 @@ class TabexPhaseManager:
     def __init__(self):
         """Инициализация менеджера фаз."""
         self.phases = TABEX_PHASES_CONFIG
-    
+
+        # Таблица день -> фаза для поиска за O(1) вместо перебора всех фаз
+        self._day_to_phase: Dict[int, TabexPhaseConfig] = {}
+        for phase in self.phases.values():
+            for day in range(phase.day_range[0], phase.day_range[1] + 1):
+                self._day_to_phase[day] = phase
+
+        # Плоская таблица день -> особое событие (событий мало, дни уникальны)
+        self._day_to_event: Dict[int, str] = {}
+        for phase in self.phases.values():
+            self._day_to_event.update(phase.special_events)
+
+        # Краткие описания фаз не меняются - форматируем их один раз
+        self._phase_summary: Dict[int, str] = {
+            phase.phase_number: f"Дни {phase.day_range[0]}-{phase.day_range[1]}: "
+                               f"{phase.doses_per_day} таб./день, "
+                               f"каждые {phase.interval_hours}ч ({phase.character})"
+            for phase in self.phases.values()
+        }
+
     def get_phase_for_day(self, day: int) -> Optional[TabexPhaseConfig]:
         """
         Определяет фазу лечения для указанного дня.
-        
+
         Args:
             day: День лечения (1-25)
-            
+
         Returns:
             Конфигурация фазы или None для недопустимых дней
         """
-        for phase in self.phases.values():
-            if phase.is_day_in_phase(day):
-                return phase
-        return None
+        return self._day_to_phase.get(day)
     
     def get_current_phase(self, current_day: int) -> TabexPhaseConfig:
         """
@@ -195,38 +264,39 @@ class TabexPhaseManager:
     def get_next_dose_time_slots(self, phase: TabexPhaseConfig, start_time: str) -> list[str]:
         """
         Рассчитывает все временные слоты приёма для фазы на один день.
-        
+
         Args:
             phase: Конфигурация фазы
             start_time: Время первого приёма в формате "HH:MM"
-            
+
         Returns:
             Список времён приёма в формате ["HH:MM", ...]
         """
-        from datetime import datetime, timedelta
-        
-        try:
-            # Парсим начальное время
-            start_dt = datetime.strptime(start_time, "%H:%M")
-            
-            # Генерируем все слоты на день
-            slots = []
-            current_time = start_dt
-            
-            for i in range(phase.doses_per_day):
-                slots.append(current_time.strftime("%H:%M"))
-                
-                # Добавляем интервал для следующего слота
-                if i < phase.doses_per_day - 1:  # Не добавляем интервал после последней дозы
-                    interval_minutes = int(phase.interval_hours * 60)
-                    current_time += timedelta(minutes=interval_minutes)
-            
-            return slots
-            
-        except ValueError:
-            # В случае ошибки возвращаем базовые слоты
-            return [start_time]
-    
+        return list(_dose_time_slots(phase.doses_per_day, phase.interval_hours, start_time))
+
+    def get_dose_time_slots_batch(self, phase: TabexPhaseConfig, start_times: list[str]) -> Dict[str, list[str]]:
+        """
+        Рассчитывает слоты приёма сразу для нескольких времён старта.
+
+        Удобно для массового пересчёта расписаний (например, для всех
+        активных пользователей одной фазы). Уникальных времён старта
+        обычно намного меньше, чем пользователей, поэтому повторные
+        значения обслуживаются из кэша _dose_time_slots без пересчёта.
+
+        Args:
+            phase: Конфигурация фазы
+            start_times: Времена первого приёма в формате "HH:MM"
+
+        Returns:
+            Словарь {время_старта: [времена приёма]}
+        """
+        doses = phase.doses_per_day
+        interval = phase.interval_hours
+        return {
+            start_time: list(_dose_time_slots(doses, interval, start_time))
+            for start_time in set(start_times)
+        }
+
     def get_special_event_for_day(self, day: int) -> Optional[str]:
         """
         Получает особое событие для указанного дня.
@@ -237,10 +307,7 @@ class TabexPhaseManager:
         Returns:
             Описание особого события или None
         """
-        phase = self.get_phase_for_day(day)
-        if not phase:
-            return None
-        return phase.get_special_event_for_day(day)
+        return self._day_to_event.get(day)
     
     def is_critical_day(self, day: int) -> bool:
         """
@@ -261,12 +328,7 @@ class TabexPhaseManager:
         Returns:
             Словарь {номер_фазы: краткое_описание}
         """
-        return {
-            phase.phase_number: f"Дни {phase.day_range[0]}-{phase.day_range[1]}: "
-                               f"{phase.doses_per_day} таб./день, "
-                               f"каждые {phase.interval_hours}ч ({phase.character})"
-            for phase in self.phases.values()
-        }
+        return self._phase_summary
 
 
 # Глобальный экземпляр менеджера фаз
@@ -6,8 +6,10 @@
 """
 import asyncio
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from telegram import Update
-from telegram.ext import Application, ContextTypes
+from telegram.ext import AIORateLimiter, Application, ContextTypes, Defaults
 from telegram.constants import ParseMode
 
 from config.settings import settings
@@ -15,14 +17,31 @@ from core.handlers.commands import setup_command_handlers
 from core.handlers.callbacks import setup_callback_handlers
 from database.connection import init_database
 
-# Настройка логирования
+# Уровень логирования разрешается в число один раз при импорте
+_LOG_LEVEL = logging.getLevelName(settings.log_level)
+if not isinstance(_LOG_LEVEL, int):
+    raise ValueError(f"Недопустимый LOG_LEVEL: {settings.log_level!r}")
+
+# Настройка логирования: запись в файл и на консоль идёт через очередь,
+# чтобы обработчики бота не блокировались на дисковом вводе-выводе
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_file_handler = logging.FileHandler('tabex_bot.log', encoding='utf-8')
+_file_handler.setFormatter(_log_formatter)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_log_formatter)
+
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, _file_handler, _stream_handler)
+_log_listener.start()
+
+# QueueHandler только подставляет аргументы в сообщение;
+# финальное форматирование выполняют обработчики слушателя
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
 logging.basicConfig(
-    level=getattr(logging, settings.log_level.upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('tabex_bot.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    level=_LOG_LEVEL,
+    handlers=[_queue_handler]
 )
 
 logger = logging.getLogger(__name__)
@@ -40,15 +59,27 @@ class TabexBot:
         """Инициализация бота с настройками из конфигурации."""
         self.app = None
         self.is_running = False
+        self._stop_event = asyncio.Event()
         logger.info("Инициализация Табекс-бота...")
     
     async def setup(self):
         """Настройка приложения и регистрация обработчиков."""
         try:
+            # База данных инициализируется один раз на старте,
+            # а не в каждом обработчике команд
+            await init_database()
+            
             # Создание приложения Telegram
+            # block=False по умолчанию: обработчики выполняются как
+            # независимые задачи, медленный запрос не стопорит остальных.
+            # AIORateLimiter дозирует все исходящие вызовы Bot API под
+            # лимиты Telegram (30/с на бота), чтобы веер напоминаний
+            # не упирался в 429 и повторные попытки
             self.app = (
                 Application.builder()
                 .token(settings.bot_token)
+                .defaults(Defaults(block=False))
+                .rate_limiter(AIORateLimiter())
                 .build()
             )
             
@@ -91,6 +122,7 @@ class TabexBot:
             )
             
             self.is_running = True
+            self._stop_event.clear()
             logger.info("Табекс-бот успешно запущен и готов к работе!")
             
         except Exception as e:
@@ -104,42 +136,40 @@ class TabexBot:
             return
         
         self.is_running = False
+        self._stop_event.set()
         
         try:
             logger.info("Остановка Табекс-бота...")
             
+            # asyncio.timeout вместо wait_for: без оборачивания каждого шага
+            # в отдельную задачу. Порядок шагов фиксирован семантикой PTB:
+            # updater -> app.stop -> app.shutdown
             if self.app and self.app.updater:
                 try:
                     # Останавливаем updater с таймаутом
-                    await asyncio.wait_for(
-                        self.app.updater.stop(),
-                        timeout=10.0
-                    )
+                    async with asyncio.timeout(10.0):
+                        await self.app.updater.stop()
                     logger.info("Updater остановлен")
                 except asyncio.TimeoutError:
                     logger.warning("Таймаут при остановке updater'а")
                 except Exception as e:
                     logger.error(f"Ошибка при остановке updater'а: {e}")
-            
+
             if self.app:
                 try:
                     # Останавливаем приложение с таймаутом
-                    await asyncio.wait_for(
-                        self.app.stop(),
-                        timeout=5.0
-                    )
+                    async with asyncio.timeout(5.0):
+                        await self.app.stop()
                     logger.info("Приложение остановлено")
                 except asyncio.TimeoutError:
                     logger.warning("Таймаут при остановке приложения")
                 except Exception as e:
                     logger.error(f"Ошибка при остановке приложения: {e}")
-                
+
                 try:
                     # Завершаем shutdown с таймаутом
-                    await asyncio.wait_for(
-                        self.app.shutdown(),
-                        timeout=5.0
-                    )
+                    async with asyncio.timeout(5.0):
+                        await self.app.shutdown()
                     logger.info("Shutdown завершён")
                 except asyncio.TimeoutError:
                     logger.warning("Таймаут при shutdown приложения")
@@ -158,9 +188,8 @@ class TabexBot:
         try:
             await self.start()
             
-            # Ожидание завершения работы
-            while self.is_running:
-                await asyncio.sleep(1)
+            # Ожидание сигнала остановки без периодических пробуждений цикла
+            await self._stop_event.wait()
                 
         except KeyboardInterrupt:
             logger.info("Получен сигнал прерывания, остановка бота...")
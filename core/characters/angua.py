@@ -18,7 +18,9 @@ class AnguaCharacter(BaseCharacter):
     Острая, саркастичная, с феминистским подтекстом.
     Прямолинейная, не терпит снисходительности, особенно к женщинам.
     """
-    
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Ангва",
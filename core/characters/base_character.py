@@ -5,12 +5,40 @@
 и обеспечивает гендерно-зависимую генерацию текстов.
 """
 import logging
+import sys
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import Dict, List, Optional
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Гендерно-зависимые обращения; строки интернированы,
+# чтобы поиск по словарю шёл по идентичности
+_PRONOUNS: Dict[str, str] = {
+    sys.intern('male'): sys.intern('гражданин'),
+    sys.intern('female'): sys.intern('гражданка'),
+}
+
+
+# Шаблоны горячих ответов в %-стиле: одна C-подстановка вместо
+# последовательности FORMAT_VALUE/BUILD_STRING на каждый вызов
+_DOSE_TAKEN_TMPL = "%s **Хорошо, %s %s!**\n\nТаблетка принята, записано."
+_DOSE_SKIPPED_TMPL = "%s **%s %s, это плохо!**\n\nПропуск зафиксирован. Больше так не делай."
+_DOSE_POSTPONED_TMPL = "%s Ладно, напомню через 5 минут. Но не злоупотребляй!"
+
+
+@lru_cache(maxsize=1024)
+def _dose_taken_response(emoji: str, pronoun: str, user_name: str) -> str:
+    """Кэшированный текст реакции на принятую таблетку."""
+    return _DOSE_TAKEN_TMPL % (emoji, pronoun, user_name)
+
+
+@lru_cache(maxsize=1024)
+def _dose_skipped_response(emoji: str, pronoun: str, user_name: str) -> str:
+    """Кэшированный текст реакции на пропуск таблетки."""
+    return _DOSE_SKIPPED_TMPL % (emoji, pronoun.title(), user_name)
+
 
 class MessageType(Enum):
     """Типы сообщений персонажей."""
@@ -31,7 +59,11 @@ class BaseCharacter(ABC):
     Определяет общий интерфейс для взаимодействия с пользователями
     и предоставляет механизмы гендерной дифференциации текстов.
     """
-    
+
+    # Атрибуты фиксированы: без __dict__ экземпляр компактнее,
+    # а доступ к атрибутам идёт через C-слоты
+    __slots__ = ('name', 'phase_days', 'emoji', 'logger', '_phase_range')
+
     def __init__(self, name: str, phase_days: tuple, emoji: str):
         """
         Инициализация персонажа.
@@ -45,6 +77,8 @@ class BaseCharacter(ABC):
         self.phase_days = phase_days
         self.emoji = emoji
         self.logger = logging.getLogger(f"character.{name.lower()}")
+        # range поддерживает O(1) проверку вхождения целого числа на уровне C
+        self._phase_range = range(phase_days[0], phase_days[1] + 1)
     
     @abstractmethod
     def get_greeting_message(self, user_name: str, user_gender: str) -> str:
@@ -132,7 +166,7 @@ class BaseCharacter(ABC):
             Положительная реакция персонажа
         """
         gender_pronoun = self._get_gender_pronoun(user_gender)
-        return f"{self.emoji} **Хорошо, {gender_pronoun} {user_name}!**\n\nТаблетка принята, записано."
+        return _dose_taken_response(self.emoji, gender_pronoun, user_name)
     
     def get_dose_postponed_response(self, user_name: str, user_gender: str) -> str:
         """
@@ -145,7 +179,7 @@ class BaseCharacter(ABC):
         Returns:
             Реакция на отсрочку
         """
-        return f"{self.emoji} Ладно, напомню через 5 минут. Но не злоупотребляй!"
+        return _DOSE_POSTPONED_TMPL % self.emoji
     
     def get_dose_skipped_response(self, user_name: str, user_gender: str) -> str:
         """
@@ -159,7 +193,7 @@ class BaseCharacter(ABC):
             Негативная реакция на пропуск
         """
         gender_pronoun = self._get_gender_pronoun(user_gender)
-        return f"{self.emoji} **{gender_pronoun.title()} {user_name}, это плохо!**\n\nПропуск зафиксирован. Больше так не делай."
+        return _dose_skipped_response(self.emoji, gender_pronoun, user_name)
     
     def _get_gender_pronoun(self, user_gender: str) -> str:
         """
@@ -171,7 +205,7 @@ class BaseCharacter(ABC):
         Returns:
             "гражданин" для мужчин, "гражданка" для женщин
         """
-        return "гражданин" if user_gender == 'male' else "гражданка"
+        return _PRONOUNS.get(user_gender, _PRONOUNS['female'])
     
     def _get_gender_ending(self, user_gender: str, male_ending: str = "", female_ending: str = "а") -> str:
         """
@@ -197,7 +231,7 @@ class BaseCharacter(ABC):
         Returns:
             True, если персонаж активен в этот день
         """
-        return self.phase_days[0] <= day <= self.phase_days[1]
+        return day in self._phase_range
     
     def __str__(self) -> str:
         return f"{self.name} (дни {self.phase_days[0]}-{self.phase_days[1]})"
@@ -17,7 +17,9 @@ class CarrotCharacter(BaseCharacter):
     Искренне верит в способность каждого человека к исправлению.
     Наивный, но сердечный подход к долгу.
     """
-    
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Моркоу",
@@ -17,7 +17,9 @@ class DeathCharacter(BaseCharacter):
     Буквальный, беспристрастный, предлагает новый шанс через время.
     Архаичные обороты речи, капс для усиления.
     """
-    
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="СМЕРТЬ",
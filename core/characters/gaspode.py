@@ -16,7 +16,9 @@ class GaspodeCharacter(BaseCharacter):
     Активен в дни 1-3 курса лечения.
     Отвечает за арест, первичный допрос и передачу курильщика стражникам.
     """
-    
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Гаспод",
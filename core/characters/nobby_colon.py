@@ -18,7 +18,9 @@ class NobbyColonCharacter(BaseCharacter):
     Шнобби - простецкий, туповатый, но незлобивый.
     Колон - добродушный философ, мягкий "дядюшка".
     """
-    
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Шноббс и Колон", 
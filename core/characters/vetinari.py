@@ -17,7 +17,9 @@ class VetinariCharacter(BaseCharacter):
     Раскрывает истинную цель программы "Табекс".
     Изощренная вежливость, тонкие намеки, многоуровневые смыслы.
     """
-    
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Ветинари",
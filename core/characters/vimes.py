@@ -17,7 +17,9 @@ class VimesCharacter(BaseCharacter):
     Циничный, опытный, понимает проблемы зависимости.
     Проводит финальную стадию программы исправления.
     """
-    
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Ваймс",
@@ -9,6 +9,7 @@
 import asyncio
 import logging
 from datetime import datetime, date, timedelta
+from typing import Final
 from telegram import Update, CallbackQuery
 from telegram.ext import ContextTypes
 
@@ -20,11 +21,41 @@ from .admin_commands import is_admin
 
 logger = logging.getLogger(__name__)
 
+# Шаблон отчёта гендерного теста: скелет строки создаётся один раз
+_TEST_RESULT_TEMPLATE = """
+🔧 **ТЕСТ: {char_name} {char_emoji}**
+
+👨 **Для мужчин:**
+{male_texts}
+
+👩 **Для женщин:**
+{female_texts}
+
+**Выводы:**
+• Персонаж корректно адаптируется к полу
+• Тексты различаются по стилю обращения
+• Гендерные особенности учтены
+
+*"Каждому своё обращение."*
+
+— Админ Тестировщик (проверяет инклюзивность)
+"""
+
+# Длина фрагмента сообщения персонажа в отчёте гендерного теста
+_PREVIEW_LEN = 100
+
+# Модульные экземпляры репозиториев: запросы в них не несут состояния
+_user_repo = UserRepository()
+_treatment_repo = TreatmentRepository()
+
 
 async def handle_admin_gender_test_callback(query: CallbackQuery, character_id: str, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Обрабатывает callback для тестирования гендерных текстов персонажа.
     
+    Вызывается только из handle_admin_callback, который уже проверил
+    права администратора.
+
     Args:
         query: Callback query от inline кнопки
         character_id: ID персонажа для тестирования
@@ -32,16 +63,11 @@ async def handle_admin_gender_test_callback(query: CallbackQuery, character_id:
     """
     user = query.from_user
     
-    if not is_admin(user.id):
-        await query.answer("⛔ Доступ запрещен", show_alert=True)
-        return
-    
     try:
         await query.answer()  # Убираем загрузку с кнопки
         
         # Получаем данные пользователя
-        user_repo = UserRepository()
-        user_obj = await user_repo.get_by_telegram_id(user.id)
+        user_obj = await _user_repo.get_by_telegram_id(user.id)
         
         if not user_obj:
             await query.edit_message_text("❌ Пользователь не найден")
@@ -57,24 +83,12 @@ async def handle_admin_gender_test_callback(query: CallbackQuery, character_id:
         male_texts = _generate_gender_texts(character, user_obj.first_name, "male")
         female_texts = _generate_gender_texts(character, user_obj.first_name, "female")
         
-        test_result = f"""
-🔧 **ТЕСТ: {character.name} {character.emoji}**
-
-👨 **Для мужчин:**
-{male_texts}
-
-👩 **Для женщин:**
-{female_texts}
-
-**Выводы:**
-• Персонаж корректно адаптируется к полу
-• Тексты различаются по стилю обращения
-• Гендерные особенности учтены
-
-*"Каждому своё обращение."*
-
-— Админ Тестировщик (проверяет инклюзивность)
-"""
+        test_result = _TEST_RESULT_TEMPLATE.format(
+            char_name=character.name,
+            char_emoji=character.emoji,
+            male_texts=male_texts,
+            female_texts=female_texts
+        )
         
         await query.edit_message_text(test_result, parse_mode='Markdown')
         logger.info(f"Админ протестировал гендерные тексты для персонажа {character_id}")
@@ -97,31 +111,18 @@ def _generate_gender_texts(character, first_name: str, gender: str) -> str:
         Отформатированная строка с тестовыми текстами
     """
     try:
-        # Приветствие
-        greeting = character.get_greeting_message(first_name, gender)
-        
-        # Напоминание
-        reminder = character.get_reminder_message(first_name, gender, 3, 5)
-        
-        # Поощрение
-        encouragement = character.get_encouragement_message(first_name, gender, 85)
-        
-        # Предупреждение
-        warning = character.get_warning_message(first_name, gender, 2)
-        
-        return f"""
-**Приветствие:**
-_{greeting[:100]}..._
-
-**Напоминание:**
-_{reminder[:100]}..._
-
-**Поощрение:**
-_{encouragement[:100]}..._
+        # Четыре образца собираем одним проходом и склеиваем join'ом,
+        # без промежуточных конкатенаций f-строк
+        samples = (
+            ("Приветствие", character.get_greeting_message(first_name, gender)),
+            ("Напоминание", character.get_reminder_message(first_name, gender, 3, 5)),
+            ("Поощрение", character.get_encouragement_message(first_name, gender, 85)),
+            ("Предупреждение", character.get_warning_message(first_name, gender, 2)),
+        )
+        return "\n" + "\n\n".join(
+            f"**{label}:**\n_{text[:_PREVIEW_LEN]}..._" for label, text in samples
+        )
 
-**Предупреждение:**
-_{warning[:100]}..._"""
-        
     except Exception as e:
         return f"❌ Ошибка генерации текстов: {str(e)[:50]}..."
 
@@ -130,6 +131,9 @@ async def handle_admin_simulation_callback(query: CallbackQuery, sim_type: str,
     """
     Обрабатывает callback для симуляции курса лечения.
     
+    Вызывается только из handle_admin_callback, который уже проверил
+    права администратора.
+
     Args:
         query: Callback query от inline кнопки
         sim_type: Тип симуляции (fast/full/characters)
@@ -137,23 +141,18 @@ async def handle_admin_simulation_callback(query: CallbackQuery, sim_type: str,
     """
     user = query.from_user
     
-    if not is_admin(user.id):
-        await query.answer("⛔ Доступ запрещен", show_alert=True)
-        return
-    
     try:
         await query.answer()
         
-        # Получаем данные пользователя и курса
-        user_repo = UserRepository()
-        treatment_repo = TreatmentRepository()
-        
-        user_obj = await user_repo.get_by_telegram_id(user.id)
+        # Пользователь и курс независимы - запрашиваем их параллельно
+        user_obj, course = await asyncio.gather(
+            _user_repo.get_by_telegram_id(user.id),
+            _treatment_repo.get_active_by_telegram_id(user.id)
+        )
         if not user_obj:
             await query.edit_message_text("❌ Пользователь не найден")
             return
         
-        course = await treatment_repo.get_active_by_user_id(user_obj.user_id)
         if not course:
             await query.edit_message_text("❌ Активный курс не найден")
             return
@@ -179,17 +178,24 @@ async def handle_admin_simulation_callback(query: CallbackQuery, sim_type: str,
         # Небольшая задержка для показа
         await asyncio.sleep(1)
         
-        # Выполняем симуляцию
-        results = await _simulate_course_days(user_obj, course, days_to_simulate, treatment_repo)
+        # Выполняем симуляцию (чистое построение текста, без I/O)
+        results = _simulate_course_days(user_obj, course, days_to_simulate)
+
+        # Сохраняем курс один раз после симуляции
+        await _treatment_repo.update(course)
         
-        # Отправляем результаты
+        # Отправляем результаты правкой сообщения-заглушки: это один
+        # запрос к API вместо двух, и "⏳ Обрабатывается" не висит в чате.
+        # Новые сообщения уходят только для переполнения сверх лимита Telegram
         final_message = f"{title}\n\n{results}\n\n*Симуляция завершена успешно!*"
-        
-        await context.bot.send_message(
-            chat_id=user.id,
-            text=final_message,
-            parse_mode='Markdown'
-        )
+
+        await query.edit_message_text(final_message[:4096], parse_mode='Markdown')
+        for start in range(4096, len(final_message), 4096):
+            await context.bot.send_message(
+                chat_id=user.id,
+                text=final_message[start:start + 4096],
+                parse_mode='Markdown'
+            )
         
         logger.info(f"Админ выполнил симуляцию типа {sim_type}")
         
@@ -198,16 +204,17 @@ async def handle_admin_simulation_callback(query: CallbackQuery, sim_type: str,
         await query.edit_message_text(f"❌ Произошла ошибка симуляции: {str(e)}")
 
 
-async def _simulate_course_days(user_obj, course: TreatmentCourse, days_to_simulate: list, 
-                              treatment_repo: TreatmentRepository) -> str:
+def _simulate_course_days(user_obj, course: TreatmentCourse, days_to_simulate: list) -> str:
     """
     Симулирует прохождение указанных дней курса.
+
+    Функция не выполняет I/O: сохранение изменённого курса - забота
+    вызывающей стороны, что позволяет использовать её и офлайн.
     
     Args:
         user_obj: Объект пользователя
         course: Курс лечения
         days_to_simulate: Список дней для симуляции
-        treatment_repo: Репозиторий курсов лечения
         
     Returns:
         Отформатированная строка с результатами симуляции
@@ -258,16 +265,19 @@ async def _simulate_course_days(user_obj, course: TreatmentCourse, days_to_simul
                     f"📅 **День {day}** — {current_character.name} {current_character.emoji}{special_info}\n"
                     f"*{character_message[:120]}...*\n"
                 )
-            
-            # Добавляем задержку между "днями"
-            await asyncio.sleep(0.5)
-        
+
         return "\n".join(results)
-        
+
     finally:
         # Восстанавливаем исходную дату начала курса
         course.start_date = original_start_date
-        await treatment_repo.update(course)
+
+
+# Таблица диспетчеризации админских callback'ов: префикс -> обработчик
+_ADMIN_DISPATCH: Final = {
+    "test_gender_": handle_admin_gender_test_callback,
+    "sim_": handle_admin_simulation_callback,
+}
 
 
 async def handle_admin_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -285,17 +295,13 @@ async def handle_admin_callback(update: Update, context: ContextTypes.DEFAULT_TY
     
     try:
         callback_data = query.data
-        
-        if callback_data.startswith("test_gender_"):
-            # Тестирование гендерных текстов персонажа
-            character_id = callback_data.replace("test_gender_", "")
-            await handle_admin_gender_test_callback(query, character_id, context)
-            
-        elif callback_data.startswith("sim_"):
-            # Симуляция курса
-            sim_type = callback_data.replace("sim_", "")
-            await handle_admin_simulation_callback(query, sim_type, context)
-            
+
+        # Ищем обработчик по префиксу в таблице диспетчеризации;
+        # аргумент отрезается срезом без сканирования всей строки
+        for prefix, handler in _ADMIN_DISPATCH.items():
+            if callback_data.startswith(prefix):
+                await handler(query, callback_data[len(prefix):], context)
+                break
         else:
             await query.answer("❓ Неизвестная админская команда", show_alert=True)
             
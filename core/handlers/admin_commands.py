@@ -4,6 +4,7 @@
 Позволяют быстро тестировать прохождение всего курса лечения,
 проверять смену персонажей, гендерные различия и критические сценарии.
 """
+import asyncio
 import logging
 from datetime import datetime, date, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -19,9 +20,159 @@ from config.tabex_phases import phase_manager, TABEX_PHASES_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Шаблоны ответов админских команд: литеральные части строк
+# создаются один раз при импорте, в обработчиках остаётся только format()
+_JUMP_DAY_TEMPLATE = """
+🔧 **АДМИН: Переход на день {target_day}**
+
+✅ **Обновлен курс пользователя {first_name}**
+
+📅 **Новая дата начала:** {new_start_date}
+📊 **Текущий день:** {target_day}/25
+🎭 **Фаза:** {current_phase}
+👤 **Персонаж:** {char_name} {char_emoji}
+{special_info}
+
+*"Время - это иллюзия. Обеденное время - тем более."*
+
+— Админ Времени (манипулирует реальностью)
+"""
+
+_SET_PHASE_TEMPLATE = """
+🔧 **АДМИН: Смена фазы**
+
+✅ **Обновлен курс пользователя {first_name}**
+
+🎭 **Новая фаза:** {target_phase}
+👤 **Новый персонаж:** {char_name} {char_emoji}
+⏰ **Интервал приема:** каждые {interval_hours}ч
+💊 **Таблеток в день:** {doses_per_day}
+📖 **Описание:** {description}
+
+*"Иногда нужно заставить время подчиниться."*
+
+— Админ Фаз (управляет переходами)
+"""
+
+_TEST_GENDER_TEMPLATE = """
+🔧 **АДМИН: Тестирование гендерных текстов**
+
+Выберите персонажа для тестирования гендерно-зависимых сообщений.
+
+**Ваш текущий пол:** {gender_label}
+
+Для каждого персонажа будут показаны:
+• Приветствие
+• Напоминание о дозе
+• Поощрение за прогресс
+• Предупреждение при пропуске
+
+*"Важно знать, как с тобой говорят."*
+
+— Админ Гендеров (проверяет корректность)
+"""
+
+_SIM_INFO_TEMPLATE = """
+🔧 **АДМИН: Симуляция полного курса**
+
+Запуск автоматической симуляции курса лечения для **{first_name}** ({gender_short}).
+
+**Режимы симуляции:**
+
+🚀 **Быстрая** — показывает дни 1, 5, 13, 17, 21, 25 (переходы + критический день)
+
+📋 **Полная** — проходит все 25 дней с демонстрацией каждого перехода
+
+🎭 **Персонажи** — показывает только смену персонажей без изменения курса
+
+*"Время - это четвертое измерение. Но для админа - всего лишь переменная."*
+
+— Админ Симулятор (повелитель времени)
+"""
+
+_RESET_COURSE_TEMPLATE = """
+🔧 **АДМИН: Сброс курса**
+
+✅ **Курс пользователя {first_name} сброшен к началу**
+
+📅 **Дата начала:** {start_date} (сегодня)
+📊 **День:** 1/25
+🎭 **Фаза:** 1 (Начальная)
+👤 **Персонаж:** Гаспод 🐺
+🗑️ **Удалены:** все записи приемов
+⏰ **Напоминания:** остановлены
+
+**Для возобновления введите время первого приема.**
+
+*"Каждый заслуживает второй шанс. И третий. И четвертый..."*
+
+— Админ Перезагрузчик (мастер новых начал)
+"""
+
+_HELP_TEXT = """
+🔧 **АДМИНСКИЕ КОМАНДЫ ТАБЕКС-БОТА**
+
+**Навигация по курсу:**
+`/admin_jump_day <день>` — перейти на конкретный день (1-25)
+`/admin_set_phase <фаза>` — установить конкретную фазу (1-5)
+`/admin_reset_course` — сбросить курс к первому дню
+
+**Тестирование:**
+`/admin_test_gender` — проверить гендерные тексты всех персонажей
+`/admin_simulate_course` — автоматическая симуляция курса
+`/admin_help` — эта справка
+
+**Примеры использования:**
+• `/admin_jump_day 5` — переход на критический день
+• `/admin_jump_day 25` — переход к финалу с Витинари
+• `/admin_set_phase 3` — перевод в фазу Ангвы
+• `/admin_test_gender` — проверка текстов для текущего пола
+
+**Порядок полного тестирования:**
+1. Создать тестового пользователя мужского пола (/start)
+2. Проверить каждый переход: дни 1→4→13→17→21→25
+3. Протестировать критический день 5
+4. Сбросить курс и повторить для женского пола
+5. Проверить систему напоминаний и inline-кнопки
+
+*"С большой силой приходит большая ответственность. И большие возможности для тестирования."*
+
+— Админ Главный (повелитель системы)
+"""
+
 # ID админа - замените на свой Telegram ID
 ADMIN_ID = 5700485536  # Заменить на ваш Telegram ID
 
+# Персонажи для гендерного теста и статичные клавиатуры админских меню:
+# содержимое не меняется во время работы, поэтому строим их один раз
+_CHARACTERS = (
+    ("Гаспод", "gaspode", 1),
+    ("Шнобби и Колон", "nobby_colon", 2),
+    ("Ангва", "angua", 3),
+    ("Моркоу", "carrot", 4),
+    ("Ваймс", "vimes", 5),
+    ("Витинари", "vetinari", 6),
+    ("СМЕРТЬ", "death", 7)
+)
+
+_GENDER_TEST_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton(f"{num}. {name}", callback_data=f"test_gender_{char_id}")]
+    for name, char_id, num in _CHARACTERS
+])
+
+_SIM_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🚀 Быстрая симуляция (ключевые дни)", callback_data="sim_fast")],
+    [InlineKeyboardButton("📋 Полная симуляция (все 25 дней)", callback_data="sim_full")],
+    [InlineKeyboardButton("🎭 Только переходы персонажей", callback_data="sim_characters")]
+])
+
+# Репозитории не хранят состояние запроса - создаём по одному экземпляру
+# на модуль вместо аллокации в каждом обработчике
+_user_repo = UserRepository()
+_treatment_repo = TreatmentRepository()
+_tabex_repo = TabexRepository()
+
+
 def is_admin(user_id: int) -> bool:
     """Проверяет, является ли пользователь администратором."""
     return user_id == ADMIN_ID
@@ -55,16 +206,15 @@ async def admin_jump_day_command(update: Update, context: ContextTypes.DEFAULT_T
             await update.message.reply_text("❌ День должен быть от 1 до 25")
             return
         
-        # Получаем данные пользователя и курса
-        user_repo = UserRepository()
-        treatment_repo = TreatmentRepository()
-        
-        user_obj = await user_repo.get_by_telegram_id(user.id)
+        # Пользователь и курс независимы - запрашиваем их параллельно
+        user_obj, course = await asyncio.gather(
+            _user_repo.get_by_telegram_id(user.id),
+            _treatment_repo.get_active_by_telegram_id(user.id)
+        )
         if not user_obj:
             await update.message.reply_text("❌ Пользователь не найден. Запустите /start")
             return
         
-        course = await treatment_repo.get_active_by_user_id(user_obj.user_id)
         if not course:
             await update.message.reply_text("❌ Активный курс не найден. Запустите /start")
             return
@@ -81,34 +231,28 @@ async def admin_jump_day_command(update: Update, context: ContextTypes.DEFAULT_T
             course.current_phase = phase_config.phase_number
             course.current_character = phase_config.character
         
-        await treatment_repo.update(course)
-        
-        # Получаем информацию о персонаже
-        current_character = character_service.get_current_character(course)
-        
-        # Специальное событие для 5-го дня
+        # Специальное событие для 5-го дня: выставляем дату отказа
+        # до записи, чтобы курс сохранялся одним обновлением
         special_info = ""
         if target_day == 5:
             if not course.smoking_quit_date:
                 course.smoking_quit_date = new_start_date + timedelta(days=4)
-                await treatment_repo.update(course)
             special_info = "\n🚭 **КРИТИЧЕСКИЙ ДЕНЬ: полный отказ от курения!**"
-        
-        result_message = f"""
-🔧 **АДМИН: Переход на день {target_day}**
 
-✅ **Обновлен курс пользователя {user_obj.first_name}**
+        await _treatment_repo.update(course)
 
-📅 **Новая дата начала:** {new_start_date.strftime('%d.%m.%Y')}
-📊 **Текущий день:** {target_day}/25
-🎭 **Фаза:** {course.current_phase}
-👤 **Персонаж:** {current_character.name} {current_character.emoji}
-{special_info}
-
-*"Время - это иллюзия. Обеденное время - тем более."*
-
-— Админ Времени (манипулирует реальностью)
-"""
+        # Получаем информацию о персонаже
+        current_character = character_service.get_current_character(course)
+        
+        result_message = _JUMP_DAY_TEMPLATE.format(
+            target_day=target_day,
+            first_name=user_obj.first_name,
+            new_start_date=new_start_date.strftime('%d.%m.%Y'),
+            current_phase=course.current_phase,
+            char_name=current_character.name,
+            char_emoji=current_character.emoji,
+            special_info=special_info
+        )
         
         await update.message.reply_text(result_message, parse_mode='Markdown')
         logger.info(f"Админ перевел пользователя {user.id} на день {target_day}")
@@ -151,16 +295,15 @@ async def admin_set_phase_command(update: Update, context: ContextTypes.DEFAULT_
             await update.message.reply_text("❌ Фаза должна быть от 1 до 5")
             return
         
-        # Получаем данные пользователя и курса
-        user_repo = UserRepository()
-        treatment_repo = TreatmentRepository()
-        
-        user_obj = await user_repo.get_by_telegram_id(user.id)
+        # Пользователь и курс независимы - запрашиваем их параллельно
+        user_obj, course = await asyncio.gather(
+            _user_repo.get_by_telegram_id(user.id),
+            _treatment_repo.get_active_by_telegram_id(user.id)
+        )
         if not user_obj:
             await update.message.reply_text("❌ Пользователь не найден. Запустите /start")
             return
         
-        course = await treatment_repo.get_active_by_user_id(user_obj.user_id)
         if not course:
             await update.message.reply_text("❌ Активный курс не найден. Запустите /start")
             return
@@ -170,26 +313,20 @@ async def admin_set_phase_command(update: Update, context: ContextTypes.DEFAULT_
         course.current_phase = target_phase
         course.current_character = phase_config.character
         
-        await treatment_repo.update(course)
+        await _treatment_repo.update(course)
         
         # Получаем информацию о персонаже
         current_character = character_service.get_current_character(course)
         
-        result_message = f"""
-🔧 **АДМИН: Смена фазы**
-
-✅ **Обновлен курс пользователя {user_obj.first_name}**
-
-🎭 **Новая фаза:** {target_phase}
-👤 **Новый персонаж:** {current_character.name} {current_character.emoji}
-⏰ **Интервал приема:** каждые {phase_config.interval_hours}ч
-💊 **Таблеток в день:** {phase_config.doses_per_day}
-📖 **Описание:** {phase_config.description}
-
-*"Иногда нужно заставить время подчиниться."*
-
-— Админ Фаз (управляет переходами)
-"""
+        result_message = _SET_PHASE_TEMPLATE.format(
+            target_phase=target_phase,
+            first_name=user_obj.first_name,
+            char_name=current_character.name,
+            char_emoji=current_character.emoji,
+            interval_hours=phase_config.interval_hours,
+            doses_per_day=phase_config.doses_per_day,
+            description=phase_config.description
+        )
         
         await update.message.reply_text(result_message, parse_mode='Markdown')
         logger.info(f"Админ установил фазу {target_phase} для пользователя {user.id}")
@@ -215,52 +352,20 @@ async def admin_test_gender_command(update: Update, context: ContextTypes.DEFAUL
     
     try:
         # Получаем данные пользователя
-        user_repo = UserRepository()
-        user_obj = await user_repo.get_by_telegram_id(user.id)
+        user_obj = await _user_repo.get_by_telegram_id(user.id)
         
         if not user_obj:
             await update.message.reply_text("❌ Пользователь не найден. Запустите /start")
             return
         
-        # Создаем клавиатуру для выбора персонажа
-        characters = [
-            ("Гаспод", "gaspode", 1),
-            ("Шнобби и Колон", "nobby_colon", 2),
-            ("Ангва", "angua", 3),
-            ("Моркоу", "carrot", 4),
-            ("Ваймс", "vimes", 5),
-            ("Витинари", "vetinari", 6),
-            ("СМЕРТЬ", "death", 7)
-        ]
-        
-        keyboard = []
-        for name, char_id, num in characters:
-            keyboard.append([InlineKeyboardButton(f"{num}. {name}", callback_data=f"test_gender_{char_id}")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        test_info = f"""
-🔧 **АДМИН: Тестирование гендерных текстов**
-
-Выберите персонажа для тестирования гендерно-зависимых сообщений.
-
-**Ваш текущий пол:** {'Мужской' if user_obj.is_male() else 'Женский'}
-
-Для каждого персонажа будут показаны:
-• Приветствие
-• Напоминание о дозе
-• Поощрение за прогресс
-• Предупреждение при пропуске
-
-*"Важно знать, как с тобой говорят."*
-
-— Админ Гендеров (проверяет корректность)
-"""
+        test_info = _TEST_GENDER_TEMPLATE.format(
+            gender_label='Мужской' if user_obj.is_male() else 'Женский'
+        )
         
         await update.message.reply_text(
             test_info,
             parse_mode='Markdown',
-            reply_markup=reply_markup
+            reply_markup=_GENDER_TEST_MARKUP
         )
         
     except Exception as e:
@@ -281,50 +386,28 @@ async def admin_simulate_full_course_command(update: Update, context: ContextTyp
         return
     
     try:
-        # Получаем данные пользователя и курса
-        user_repo = UserRepository()
-        treatment_repo = TreatmentRepository()
-        
-        user_obj = await user_repo.get_by_telegram_id(user.id)
+        # Пользователь и курс независимы - запрашиваем их параллельно
+        user_obj, course = await asyncio.gather(
+            _user_repo.get_by_telegram_id(user.id),
+            _treatment_repo.get_active_by_telegram_id(user.id)
+        )
         if not user_obj:
             await update.message.reply_text("❌ Пользователь не найден. Запустите /start")
             return
         
-        course = await treatment_repo.get_active_by_user_id(user_obj.user_id)
         if not course:
             await update.message.reply_text("❌ Активный курс не найден. Запустите /start")
             return
         
-        # Создаем клавиатуру для выбора режима симуляции
-        keyboard = [
-            [InlineKeyboardButton("🚀 Быстрая симуляция (ключевые дни)", callback_data="sim_fast")],
-            [InlineKeyboardButton("📋 Полная симуляция (все 25 дней)", callback_data="sim_full")],
-            [InlineKeyboardButton("🎭 Только переходы персонажей", callback_data="sim_characters")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        sim_info = f"""
-🔧 **АДМИН: Симуляция полного курса**
-
-Запуск автоматической симуляции курса лечения для **{user_obj.first_name}** ({'М' if user_obj.is_male() else 'Ж'}).
-
-**Режимы симуляции:**
-
-🚀 **Быстрая** — показывает дни 1, 5, 13, 17, 21, 25 (переходы + критический день)
-
-📋 **Полная** — проходит все 25 дней с демонстрацией каждого перехода
-
-🎭 **Персонажи** — показывает только смену персонажей без изменения курса
-
-*"Время - это четвертое измерение. Но для админа - всего лишь переменная."*
-
-— Админ Симулятор (повелитель времени)
-"""
+        sim_info = _SIM_INFO_TEMPLATE.format(
+            first_name=user_obj.first_name,
+            gender_short='М' if user_obj.is_male() else 'Ж'
+        )
         
         await update.message.reply_text(
             sim_info,
             parse_mode='Markdown',
-            reply_markup=reply_markup
+            reply_markup=_SIM_MENU_MARKUP
         )
         
     except Exception as e:
@@ -343,17 +426,15 @@ async def admin_reset_course_command(update: Update, context: ContextTypes.DEFAU
         return
     
     try:
-        # Получаем данные пользователя и курса
-        user_repo = UserRepository()
-        treatment_repo = TreatmentRepository()
-        tabex_repo = TabexRepository()
-        
-        user_obj = await user_repo.get_by_telegram_id(user.id)
+        # Пользователь и курс независимы - запрашиваем их параллельно
+        user_obj, course = await asyncio.gather(
+            _user_repo.get_by_telegram_id(user.id),
+            _treatment_repo.get_active_by_telegram_id(user.id)
+        )
         if not user_obj:
             await update.message.reply_text("❌ Пользователь не найден. Запустите /start")
             return
         
-        course = await treatment_repo.get_active_by_user_id(user_obj.user_id)
         if not course:
             await update.message.reply_text("❌ Активный курс не найден. Запустите /start")
             return
@@ -364,32 +445,18 @@ async def admin_reset_course_command(update: Update, context: ContextTypes.DEFAU
         course.current_character = 'gaspode'
         course.smoking_quit_date = None
         
-        await treatment_repo.update(course)
+        await _treatment_repo.update(course)
         
         # Удаляем все логи приемов
-        await tabex_repo.delete_all_logs_for_user(user_obj.user_id)
+        await _tabex_repo.delete_all_logs_for_user(user_obj.user_id)
         
         # Останавливаем напоминания и перезапускаем
         await reminder_service.stop_reminders_for_user(user.id)
         
-        result_message = f"""
-🔧 **АДМИН: Сброс курса**
-
-✅ **Курс пользователя {user_obj.first_name} сброшен к началу**
-
-📅 **Дата начала:** {course.start_date.strftime('%d.%m.%Y')} (сегодня)
-📊 **День:** 1/25
-🎭 **Фаза:** 1 (Начальная)
-👤 **Персонаж:** Гаспод 🐺
-🗑️ **Удалены:** все записи приемов
-⏰ **Напоминания:** остановлены
-
-**Для возобновления введите время первого приема.**
-
-*"Каждый заслуживает второй шанс. И третий. И четвертый..."*
-
-— Админ Перезагрузчик (мастер новых начал)
-"""
+        result_message = _RESET_COURSE_TEMPLATE.format(
+            first_name=user_obj.first_name,
+            start_date=course.start_date.strftime('%d.%m.%Y')
+        )
         
         await update.message.reply_text(result_message, parse_mode='Markdown')
         logger.info(f"Админ сбросил курс для пользователя {user.id}")
@@ -409,39 +476,8 @@ async def admin_help_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("⛔ Доступ запрещен. Эта команда только для администратора.")
         return
     
-    help_text = """
-🔧 **АДМИНСКИЕ КОМАНДЫ ТАБЕКС-БОТА**
-
-**Навигация по курсу:**
-`/admin_jump_day <день>` — перейти на конкретный день (1-25)
-`/admin_set_phase <фаза>` — установить конкретную фазу (1-5)
-`/admin_reset_course` — сбросить курс к первому дню
-
-**Тестирование:**
-`/admin_test_gender` — проверить гендерные тексты всех персонажей
-`/admin_simulate_course` — автоматическая симуляция курса
-`/admin_help` — эта справка
-
-**Примеры использования:**
-• `/admin_jump_day 5` — переход на критический день
-• `/admin_jump_day 25` — переход к финалу с Витинари
-• `/admin_set_phase 3` — перевод в фазу Ангвы
-• `/admin_test_gender` — проверка текстов для текущего пола
-
-**Порядок полного тестирования:**
-1. Создать тестового пользователя мужского пола (/start)
-2. Проверить каждый переход: дни 1→4→13→17→21→25
-3. Протестировать критический день 5
-4. Сбросить курс и повторить для женского пола
-5. Проверить систему напоминаний и inline-кнопки
-
-*"С большой силой приходит большая ответственность. И большие возможности для тестирования."*
-
-— Админ Главный (повелитель системы)
-"""
-    
     try:
-        await update.message.reply_text(help_text, parse_mode='Markdown')
+        await update.message.reply_text(_HELP_TEXT, parse_mode='Markdown')
         logger.info(f"Админ {user.id} запросил справку по админским командам")
         
     except Exception as e:
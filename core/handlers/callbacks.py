@@ -4,19 +4,206 @@
 Обрабатывает все взаимодействия пользователей с inline-клавиатурами,
 такие как подтверждение приёма таблеток, навигация по меню и настройки.
 """
+import asyncio
 import logging
-from datetime import date
-from telegram import Update
+import re
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Final
+from datetime import date, datetime, timedelta
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import BadRequest, TelegramError
 from telegram.ext import Application, CallbackQueryHandler, ContextTypes
 
 from core.models.user import User
 from core.models.treatment import TreatmentCourse
+from core.models.tabex_log import TabexLog, TabexLogStatus
 from core.services.reminder_service import reminder_service
 from core.services.character_service import character_service
-from database.repositories import UserRepository, TreatmentRepository
+from core.services.user_cache import user_cache
+from database.repositories import UserRepository, TreatmentRepository, TabexRepository
 
 logger = logging.getLogger(__name__)
 
+# Модульные экземпляры репозиториев: конструировать их в каждом
+# обработчике незачем - состояния запроса они не хранят
+_user_repo = UserRepository()
+_treatment_repo = TreatmentRepository()
+_tabex_repo = TabexRepository()
+
+# Ссылки на фоновые задачи, чтобы их не собрал сборщик мусора
+_background_tasks: set = set()
+
+# Разбор callback_data одним проходом скомпилированного выражения:
+# действие, изменяемый аргумент и необязательный числовой хвост
+_CB_RE = re.compile(
+    r'^(gender|dose_taken|dose_postpone|dose_skip|'
+    r'catchup_taken|catchup_missed|catchup_postpone)_(\w+?)(?:_(\d+))?$'
+)
+
+
+# Скелет вопроса опроса и подписи кнопок: создаются один раз при импорте,
+# в обработчике остаётся только подстановка значений
+_QUESTION_TMPL = """
+{emoji} **Допрос #{n}/{total}**
+
+{pronoun} {name}, что было в **{time}**?
+
+⏰ **Доза №{dose_number} ({day}-й день)**
+
+Отвечай честно - {char} всё равно всё выяснит!
+
+*"Правда выходит наружу рано или поздно."*
+"""
+
+_BTN_TAKEN_LABEL = "✅ Принял(а)"
+_BTN_MISSED_LABEL = "❌ Пропуск"
+_BTN_POSTPONE_LABEL = "⏰ Отложить на 5 мин"
+
+# Повторяющиеся тексты ошибок и обращений: одна строка на модуль
+# вместо нового unicode-объекта при каждом вызове обработчика
+_ERR_PROCESS = "❌ Произошла ошибка при обработке"
+_ERR_NO_SURVEY_DATA = "❌ Ошибка: данные опроса не найдены"
+_PRONOUN_MALE = "гражданин"
+_PRONOUN_FEMALE = "гражданка"
+
+# Интернированные значения пола: разобранный из callback_data аргумент
+# тоже интернируется, после чего сравнение сводится к проверке identity
+_GENDER_MALE = sys.intern("male")
+_GENDER_FEMALE = sys.intern("female")
+
+
+# Этап диалога пользователя в user_data['flow_state']: одно целое
+# число вместо набора независимых булевых флагов - одна проверка
+# на каждое текстовое сообщение и меньше ключей на пользователя
+FLOW_NONE = 0
+FLOW_AWAITING_TIME = 1
+FLOW_ACTIVE = 2
+FLOW_AWAITING_DELETION = 3
+
+
+@dataclass(slots=True)
+class CatchupState:
+    """
+    Состояние интерактивного опроса по пропущенным дозам.
+
+    Хранится одним объектом в context.user_data['catchup']: обработчики
+    делают один поиск по словарю и дальше читают слоты-атрибуты вместо
+    четырёх-пяти get'ов по отдельным ключам на каждое нажатие.
+    """
+    overdue_doses: list
+    user_obj: User
+    course_obj: TreatmentCourse
+    first_dose_time: str
+    current_character: object = None
+    # Записи, накопленные за опрос; уходят в базу одной транзакцией
+    pending_logs: list = field(default_factory=list)
+
+
+# Последний отправленный текст по (chat_id, message_id): правку тем же
+# текстом Telegram отвергает ошибкой "message is not modified", поэтому
+# такие вызовы отсекаются до обращения к API. Размер словаря ограничен
+_LAST_TEXT: OrderedDict = OrderedDict()
+_LAST_TEXT_MAX = 10_000
+
+
+async def _safe_edit(query, text: str, **kwargs) -> None:
+    """
+    Правит сообщение, пропуская правку без изменения текста.
+
+    Args:
+        query: Callback query от Telegram
+        text: Новый текст сообщения
+        **kwargs: Дополнительные параметры edit_message_text
+    """
+    key = (query.message.chat_id, query.message.message_id)
+    if _LAST_TEXT.get(key) == text:
+        return
+
+    try:
+        await query.edit_message_text(text, **kwargs)
+    except BadRequest as e:
+        # Гонка с другим обработчиком: текст уже такой - не ошибка
+        if 'not modified' not in str(e).lower():
+            raise
+
+    _LAST_TEXT[key] = text
+    _LAST_TEXT.move_to_end(key)
+    if len(_LAST_TEXT) > _LAST_TEXT_MAX:
+        _LAST_TEXT.popitem(last=False)
+
+
+async def _reply_error(query, message: str) -> None:
+    """
+    Показывает пользователю короткое сообщение об ошибке.
+
+    Args:
+        query: Callback query от Telegram
+        message: Текст ошибки для пользователя
+    """
+    try:
+        await _safe_edit(query, message)
+    except TelegramError:
+        logger.error("Не удалось отправить сообщение об ошибке: %s", message)
+
+
+def _build_catchup_keyboard(dose_index: int, is_last_dose: bool) -> InlineKeyboardMarkup:
+    """
+    Собирает клавиатуру вопроса опроса для указанной дозы.
+
+    Args:
+        dose_index: Индекс дозы в списке просроченных
+        is_last_dose: Добавлять ли кнопку отсрочки (только для последней)
+
+    Returns:
+        Клавиатура с вариантами ответа
+    """
+    # Список строится одним выражением: вариант отсрочки есть
+    # только у последней дозы
+    buttons = [
+        [InlineKeyboardButton(_BTN_TAKEN_LABEL, callback_data=f"catchup_taken_{dose_index}")],
+        [InlineKeyboardButton(_BTN_MISSED_LABEL, callback_data=f"catchup_missed_{dose_index}")],
+    ] + ([
+        [InlineKeyboardButton(_BTN_POSTPONE_LABEL, callback_data=f"catchup_postpone_{dose_index}")],
+    ] if is_last_dose else [])
+
+    return InlineKeyboardMarkup(buttons)
+
+
+# Клавиатуры опроса различаются только индексом в callback_data.
+# Объекты неизменяемы, поэтому пул на типичный диапазон индексов
+# строится один раз при импорте; за его пределами собираем на месте
+_KEYBOARD_POOL_SIZE = 64
+_CATCHUP_KEYBOARDS = [_build_catchup_keyboard(i, False) for i in range(_KEYBOARD_POOL_SIZE)]
+_CATCHUP_KEYBOARDS_LAST = [_build_catchup_keyboard(i, True) for i in range(_KEYBOARD_POOL_SIZE)]
+
+
+def _catchup_keyboard(dose_index: int, is_last_dose: bool) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру вопроса опроса, по возможности из пула.
+
+    Args:
+        dose_index: Индекс дозы в списке просроченных
+        is_last_dose: Добавлять ли кнопку отсрочки (только для последней)
+
+    Returns:
+        Клавиатура с вариантами ответа
+    """
+    if dose_index < _KEYBOARD_POOL_SIZE:
+        pool = _CATCHUP_KEYBOARDS_LAST if is_last_dose else _CATCHUP_KEYBOARDS
+        return pool[dose_index]
+
+    return _build_catchup_keyboard(dose_index, is_last_dose)
+
+
+def _finish_answer_task(task: asyncio.Task) -> None:
+    """Снимает фоновую задачу подтверждения и логирует её ошибку."""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Не удалось подтвердить callback: %s", task.exception())
+
 
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -29,385 +216,299 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user = update.effective_user
     callback_data = query.data
     
-    # Подтверждаем получение callback
-    await query.answer()
+    # Подтверждаем получение callback параллельно с обработкой:
+    # ответ пользователю не обязан ждать этот round-trip к API
+    answer_task = asyncio.create_task(query.answer())
+    _background_tasks.add(answer_task)
+    answer_task.add_done_callback(_finish_answer_task)
     
-    logger.info(f"Получен callback '{callback_data}' от пользователя {user.id} ({user.first_name})")
+    logger.info("Получен callback '%s' от пользователя %s (%s)", callback_data, user.id, user.first_name)
     
     try:
-        # Обработка выбора гендера
-        if callback_data.startswith("gender_"):
-            await _handle_gender_selection(query, context, callback_data)
-        
-        # Обработка взаимодействий с дозами
-        elif callback_data.startswith("dose_taken_"):
-            await _handle_dose_taken(query, context, callback_data)
-        elif callback_data.startswith("dose_postpone_"):
-            await _handle_dose_postpone(query, context, callback_data)
-        elif callback_data.startswith("dose_skip_"):
-            await _handle_dose_skip(query, context, callback_data)
-        
-        # Обработка интерактивного опроса пропущенных доз
-        elif callback_data.startswith("catchup_taken_"):
-            await _handle_catchup_taken(query, context, callback_data)
-        elif callback_data.startswith("catchup_missed_"):
-            await _handle_catchup_missed(query, context, callback_data)
-        elif callback_data.startswith("catchup_postpone_"):
-            await _handle_catchup_postpone(query, context, callback_data)
-        
+        # Один проход регулярного выражения даёт и ключ маршрута,
+        # и уже разобранные аргументы для обработчика
+        match = _CB_RE.match(callback_data)
+
+        if match is not None:
+            action, arg, tail = match.groups()
+            await _ROUTES[action](
+                query, context, arg, int(tail) if tail is not None else None
+            )
+
         # Обработка админских callback'ов
-        elif callback_data.startswith("test_gender_") or callback_data.startswith("sim_"):
+        elif callback_data.startswith(("test_gender_", "sim_")):
             from .admin_callbacks import handle_admin_callback
             await handle_admin_callback(update, context)
-        
+
         elif callback_data == "placeholder":
-            await query.edit_message_text("🔧 Эта функция будет реализована в следующих версиях.")
-        
+            await _safe_edit(query, "🔧 Эта функция будет реализована в следующих версиях.")
+
         else:
             # Неизвестный callback
-            await query.edit_message_text(
+            await _safe_edit(query, 
                 f"❓ Неизвестное действие: {callback_data}\n\n"
                 "Возможно, используется устаревшая версия интерфейса. "
                 "Попробуйте перезапустить команду."
             )
-            logger.warning(f"Неизвестный callback_data: {callback_data}")
+            logger.warning("Неизвестный callback_data: %s", callback_data)
     
     except Exception as e:
-        logger.error(f"Ошибка при обработке callback '{callback_data}': {e}")
-        try:
-            await query.edit_message_text(
-                "🔧 Произошла ошибка при обработке запроса. "
-                "Попробуйте позже или обратитесь к администратору."
-            )
-        except Exception:
-            # Если даже отправка сообщения об ошибке не работает
-            logger.error("Не удалось отправить сообщение об ошибке для callback")
-
-
-async def _handle_dose_taken(query, context: ContextTypes.DEFAULT_TYPE, callback_data: str) -> None:
-    """
-    Обработка подтверждения приёма таблетки.
-    
-    Args:
-        query: Callback query от Telegram
-        context: Контекст обработчика
-        callback_data: Данные callback в формате "dose_taken_{course_id}_{timestamp}"
-    """
-    user = query.from_user
-    
-    try:
-        # Парсим callback_data: dose_taken_123_1234567890
-        parts = callback_data.split('_')
-        if len(parts) != 4:
-            logger.error(f"Некорректный формат callback_data: {callback_data}")
-            await query.edit_message_text("❌ Ошибка обработки запроса")
-            return
-        
-        course_id = int(parts[2])
-        dose_timestamp = int(parts[3])
-        
-        # Обрабатываем через сервис напоминаний
-        response = await reminder_service.handle_dose_taken(
-            user.id, course_id, dose_timestamp, context.bot
+        # Общий страховочный обработчик: сюда доходят ошибки базы
+        # и программные ошибки, пропущенные узкими guard'ами ниже
+        logger.error("Ошибка при обработке callback '%s': %s", callback_data, e)
+        await _reply_error(
+            query,
+            "🔧 Произошла ошибка при обработке запроса. "
+            "Попробуйте позже или обратитесь к администратору."
         )
-        
-        await query.edit_message_text(response, parse_mode='Markdown')
-        
-    except Exception as e:
-        logger.error(f"Ошибка при обработке подтверждения дозы: {e}")
-        await query.edit_message_text("❌ Произошла ошибка при обработке")
 
 
-async def _handle_dose_postpone(query, context: ContextTypes.DEFAULT_TYPE, callback_data: str) -> None:
-    """
-    Обработка отсрочки дозы на 5 минут.
-    
-    Args:
-        query: Callback query от Telegram
-        context: Контекст обработчика
-        callback_data: Данные callback в формате "dose_postpone_{course_id}_{timestamp}"
+async def _handle_dose_action(query, context: ContextTypes.DEFAULT_TYPE, arg: str, tail: int,
+                              method) -> None:
     """
-    user = query.from_user
-    
-    try:
-        # Парсим callback_data
-        parts = callback_data.split('_')
-        if len(parts) != 4:
-            logger.error(f"Некорректный формат callback_data: {callback_data}")
-            await query.edit_message_text("❌ Ошибка обработки запроса")
-            return
-        
-        course_id = int(parts[2])
-        dose_timestamp = int(parts[3])
-        
-        # Обрабатываем через сервис напоминаний
-        response = await reminder_service.handle_dose_postpone(
-            user.id, course_id, dose_timestamp, context.bot
-        )
-        
-        await query.edit_message_text(response, parse_mode='Markdown')
-        
-    except Exception as e:
-        logger.error(f"Ошибка при обработке отсрочки дозы: {e}")
-        await query.edit_message_text("❌ Произошла ошибка при обработке")
+    Общая обработка ответа на напоминание о дозе.
 
+    Тела обработчиков приёма, отсрочки и пропуска совпадали с точностью
+    до вызываемого метода reminder_service - он передаётся параметром
+    через partial в таблице маршрутов.
 
-async def _handle_dose_skip(query, context: ContextTypes.DEFAULT_TYPE, callback_data: str) -> None:
-    """
-    Обработка пропуска дозы.
-    
     Args:
         query: Callback query от Telegram
         context: Контекст обработчика
-        callback_data: Данные callback в формате "dose_skip_{course_id}_{timestamp}"
+        arg: ID курса из callback_data "dose_{action}_{course_id}_{timestamp}"
+        tail: Timestamp дозы
+        method: Метод reminder_service для обработки ответа
     """
     user = query.from_user
     
     try:
-        # Парсим callback_data
-        parts = callback_data.split('_')
-        if len(parts) != 4:
-            logger.error(f"Некорректный формат callback_data: {callback_data}")
-            await query.edit_message_text("❌ Ошибка обработки запроса")
-            return
-        
-        course_id = int(parts[2])
-        dose_timestamp = int(parts[3])
+        course_id = int(arg)
+        dose_timestamp = tail
         
         # Обрабатываем через сервис напоминаний
-        response = await reminder_service.handle_dose_skip(
-            user.id, course_id, dose_timestamp, context.bot
-        )
+        response = await method(user.id, course_id, dose_timestamp, context.bot)
         
-        await query.edit_message_text(response, parse_mode='Markdown')
+        await _safe_edit(query, response, parse_mode='Markdown')
         
-    except Exception as e:
-        logger.error(f"Ошибка при обработке пропуска дозы: {e}")
-        await query.edit_message_text("❌ Произошла ошибка при обработке")
+    except TelegramError as e:
+        logger.error("Ошибка при обработке ответа на дозу: %s", e)
+        await _reply_error(query, _ERR_PROCESS)
 
 
-async def _handle_catchup_taken(query, context: ContextTypes.DEFAULT_TYPE, callback_data: str) -> None:
+async def _handle_catchup_taken(query, context: ContextTypes.DEFAULT_TYPE, arg: str, tail=None) -> None:
     """
     Обработка подтверждения приёма дозы в режиме опроса.
     
     Args:
         query: Callback query от Telegram
         context: Контекст обработчика
-        callback_data: Данные callback в формате "catchup_taken_{dose_index}"
+        arg: Индекс дозы из callback_data "catchup_taken_{dose_index}"
+        tail: Не используется
     """
     user = query.from_user
     
     try:
-        # Парсим callback_data: catchup_taken_0
-        dose_index = int(callback_data.split('_')[2])
+        dose_index = int(arg)
         
-        # Получаем данные из контекста
-        overdue_doses = context.user_data.get('overdue_doses', [])
-        user_obj = context.user_data.get('user_obj')
-        course_obj = context.user_data.get('course_obj')
+        # Всё состояние опроса лежит одним объектом в user_data
+        state = context.user_data.get('catchup')
         
-        if not overdue_doses or not user_obj or not course_obj:
-            await query.edit_message_text("❌ Ошибка: данные опроса не найдены")
+        if state is None or not state.overdue_doses:
+            await _reply_error(query, _ERR_NO_SURVEY_DATA)
             return
         
-        if dose_index >= len(overdue_doses):
-            await query.edit_message_text("❌ Ошибка: некорректный индекс дозы")
+        if dose_index >= len(state.overdue_doses):
+            await _reply_error(query, "❌ Ошибка: некорректный индекс дозы")
             return
         
         # Получаем дозу и создаем запись
-        dose_schedule = overdue_doses[dose_index]
-        
-        from core.models.tabex_log import TabexLog, TabexLogStatus
-        from database.repositories import TabexRepository
-        
-        tabex_repo = TabexRepository()
+        dose_schedule = state.overdue_doses[dose_index]
         
         # Создаем запись о принятой дозе
         tabex_log = TabexLog(
             log_id=None,
-            course_id=course_obj.course_id,
+            course_id=state.course_obj.course_id,
             scheduled_time=dose_schedule.scheduled_time,
             actual_time=dose_schedule.scheduled_time,  # Условно в запланированное время
             status=TabexLogStatus.TAKEN.value,
             phase=dose_schedule.phase,
             character_response=f"Подтверждено в режиме опроса"
         )
-        await tabex_repo.create_log(tabex_log)
+        # Буферизуем запись: вся пачка уйдёт в базу одной транзакцией
+        # при завершении опроса
+        state.pending_logs.append(tabex_log)
         
-        # Получаем персонажа для реакции
-        current_character = character_service.get_current_character(course_obj)
-        response = current_character.get_dose_taken_response(user_obj.first_name, user_obj.gender)
+        # Персонаж вычислен один раз при старте опроса
+        current_character = state.current_character \
+            or character_service.get_current_character(state.course_obj)
+        response = current_character.get_dose_taken_response(state.user_obj.first_name, state.user_obj.gender)
         
-        await query.edit_message_text(response, parse_mode='Markdown')
+        # Реакция персонажа и следующий вопрос уходят одной правкой
+        await _advance_catchup(query, context, dose_index, response)
         
-        # Переходим к следующей дозе или завершаем опрос
-        await _continue_catchup_or_finish(query, context, dose_index)
-        
-    except Exception as e:
-        logger.error(f"Ошибка при обработке подтверждения дозы в опросе: {e}")
-        await query.edit_message_text("❌ Произошла ошибка при обработке")
+    except TelegramError as e:
+        logger.error("Ошибка при обработке подтверждения дозы в опросе: %s", e)
+        await _reply_error(query, _ERR_PROCESS)
 
 
-async def _handle_catchup_missed(query, context: ContextTypes.DEFAULT_TYPE, callback_data: str) -> None:
+async def _handle_catchup_missed(query, context: ContextTypes.DEFAULT_TYPE, arg: str, tail=None) -> None:
     """
     Обработка пропуска дозы в режиме опроса.
     """
     user = query.from_user
     
     try:
-        dose_index = int(callback_data.split('_')[2])
+        dose_index = int(arg)
         
-        overdue_doses = context.user_data.get('overdue_doses', [])
-        user_obj = context.user_data.get('user_obj')
-        course_obj = context.user_data.get('course_obj')
+        state = context.user_data.get('catchup')
         
-        if not overdue_doses or not user_obj or not course_obj:
-            await query.edit_message_text("❌ Ошибка: данные опроса не найдены")
+        if state is None or not state.overdue_doses:
+            await _reply_error(query, _ERR_NO_SURVEY_DATA)
             return
         
-        if dose_index >= len(overdue_doses):
-            await query.edit_message_text("❌ Ошибка: некорректный индекс дозы")
+        if dose_index >= len(state.overdue_doses):
+            await _reply_error(query, "❌ Ошибка: некорректный индекс дозы")
             return
         
         # Создаем запись о пропущенной дозе
-        dose_schedule = overdue_doses[dose_index]
-        
-        from core.models.tabex_log import TabexLog, TabexLogStatus
-        from database.repositories import TabexRepository
-        
-        tabex_repo = TabexRepository()
+        dose_schedule = state.overdue_doses[dose_index]
         
         tabex_log = TabexLog(
             log_id=None,
-            course_id=course_obj.course_id,
+            course_id=state.course_obj.course_id,
             scheduled_time=dose_schedule.scheduled_time,
             status=TabexLogStatus.MISSED.value,
             phase=dose_schedule.phase,
             character_response=f"Пропущено (подтверждено в опросе)"
         )
-        await tabex_repo.create_log(tabex_log)
-        
-        # Реакция персонажа
-        current_character = character_service.get_current_character(course_obj)
-        response = current_character.get_dose_skipped_response(user_obj.first_name, user_obj.gender)
+        # Буферизуем запись до конца опроса - см. _finish_catchup_and_start_program
+        state.pending_logs.append(tabex_log)
         
-        await query.edit_message_text(response, parse_mode='Markdown')
+        # Реакция персонажа (вычислен один раз при старте опроса)
+        current_character = state.current_character \
+            or character_service.get_current_character(state.course_obj)
+        response = current_character.get_dose_skipped_response(state.user_obj.first_name, state.user_obj.gender)
         
-        # Переходим дальше
-        await _continue_catchup_or_finish(query, context, dose_index)
+        # Реакция персонажа и следующий вопрос уходят одной правкой
+        await _advance_catchup(query, context, dose_index, response)
         
-    except Exception as e:
-        logger.error(f"Ошибка при обработке пропуска дозы в опросе: {e}")
-        await query.edit_message_text("❌ Произошла ошибка при обработке")
+    except TelegramError as e:
+        logger.error("Ошибка при обработке пропуска дозы в опросе: %s", e)
+        await _reply_error(query, _ERR_PROCESS)
 
 
-async def _handle_catchup_postpone(query, context: ContextTypes.DEFAULT_TYPE, callback_data: str) -> None:
+async def _handle_catchup_postpone(query, context: ContextTypes.DEFAULT_TYPE, arg: str, tail=None) -> None:
     """
     Обработка отсрочки последней актуальной дозы на 5 минут.
     """
     user = query.from_user
     
     try:
-        dose_index = int(callback_data.split('_')[2])
+        dose_index = int(arg)
         
-        overdue_doses = context.user_data.get('overdue_doses', [])
-        user_obj = context.user_data.get('user_obj')
-        course_obj = context.user_data.get('course_obj')
-        first_dose_time = context.user_data.get('first_dose_time')
+        state = context.user_data.get('catchup')
         
-        if not overdue_doses or not user_obj or not course_obj:
-            await query.edit_message_text("❌ Ошибка: данные опроса не найдены")
+        if state is None or not state.overdue_doses:
+            await _reply_error(query, _ERR_NO_SURVEY_DATA)
             return
         
         # Должна быть последняя доза для отсрочки
-        if dose_index != len(overdue_doses) - 1:
-            await query.edit_message_text("❌ Отсрочка доступна только для последней дозы")
+        if dose_index != len(state.overdue_doses) - 1:
+            await _reply_error(query, "❌ Отсрочка доступна только для последней дозы")
             return
         
         # Завершаем опрос и запускаем обычный режим с отсрочкой
-        current_character = character_service.get_current_character(course_obj)
-        response = current_character.get_dose_postponed_response(user_obj.first_name, user_obj.gender)
+        current_character = state.current_character \
+            or character_service.get_current_character(state.course_obj)
+        response = current_character.get_dose_postponed_response(state.user_obj.first_name, state.user_obj.gender)
         
-        await query.edit_message_text(response, parse_mode='Markdown')
+        await _safe_edit(query, response, parse_mode='Markdown')
         
         # Создаем записи для всех доз кроме последней (они уже обработаны)
         await _finish_catchup_and_start_program(query, context, postpone_last=True)
         
-    except Exception as e:
-        logger.error(f"Ошибка при обработке отсрочки дозы в опросе: {e}")
-        await query.edit_message_text("❌ Произошла ошибка при обработке")
+    except TelegramError as e:
+        logger.error("Ошибка при обработке отсрочки дозы в опросе: %s", e)
+        await _reply_error(query, _ERR_PROCESS)
 
 
-async def _continue_catchup_or_finish(query, context: ContextTypes.DEFAULT_TYPE, current_dose_index: int) -> None:
+async def _advance_catchup(query, context: ContextTypes.DEFAULT_TYPE, current_dose_index: int, response: str) -> None:
     """
     Продолжает опрос или завершает его.
+
+    Реакция персонажа и следующий вопрос объединяются в одну правку
+    сообщения - один вызов Bot API на нажатие вместо двух, что вдвое
+    снижает расход лимита исходящих сообщений.
+
+    Args:
+        query: Callback query от Telegram
+        context: Контекст обработчика
+        current_dose_index: Индекс только что обработанной дозы
+        response: Реакция персонажа на ответ пользователя
     """
     try:
-        overdue_doses = context.user_data.get('overdue_doses', [])
+        state = context.user_data.get('catchup')
+        if state is None:
+            return
         next_index = current_dose_index + 1
         
         # Если есть следующая доза - продолжаем опрос
-        if next_index < len(overdue_doses):
-            user_obj = context.user_data.get('user_obj')
-            current_character = character_service.get_current_character(context.user_data.get('course_obj'))
-            
-            await _ask_about_next_dose(query, context, user_obj, overdue_doses[next_index], 
-                                     next_index, len(overdue_doses), current_character)
+        if next_index < len(state.overdue_doses):
+            current_character = state.current_character \
+                or character_service.get_current_character(state.course_obj)
+
+            next_text, next_kb = _build_next_question(
+                state.user_obj, state.overdue_doses[next_index],
+                next_index, len(state.overdue_doses), current_character
+            )
+            await _safe_edit(query, 
+                f"{response}\n\n---\n{next_text}",
+                parse_mode='Markdown',
+                reply_markup=next_kb
+            )
         else:
             # Опрос завершен - запускаем обычный режим
+            await _safe_edit(query, response, parse_mode='Markdown')
             await _finish_catchup_and_start_program(query, context)
             
     except Exception as e:
-        logger.error(f"Ошибка при продолжении опроса: {e}")
+        logger.error("Ошибка при продолжении опроса: %s", e)
 
 
-async def _ask_about_next_dose(query, context: ContextTypes.DEFAULT_TYPE,
-                              user_obj: User, dose_schedule, dose_index: int, 
-                              total_doses: int, current_character) -> None:
+def _build_next_question(user_obj: User, dose_schedule, dose_index: int,
+                         total_doses: int, current_character) -> tuple:
     """
-    Задает вопрос о следующей дозе (для callback'ов).
+    Собирает текст и клавиатуру вопроса о следующей дозе.
+
+    Args:
+        user_obj: Объект пользователя
+        dose_schedule: Расписание спрашиваемой дозы
+        dose_index: Индекс дозы в списке просроченных
+        total_doses: Общее количество просроченных доз
+        current_character: Текущий персонаж
+
+    Returns:
+        Кортеж (текст вопроса, клавиатура)
     """
-    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-    
-    try:
-        gender_pronoun = "гражданин" if user_obj.is_male() else "гражданка"
-        dose_time = dose_schedule.scheduled_time.strftime("%H:%M")
-        
-        # Определяем, это последняя доза или нет
-        is_last_dose = (dose_index == total_doses - 1)
-        
-        question_message = f"""
-{current_character.emoji} **Допрос #{dose_index + 1}/{total_doses}**
+    gender_pronoun = user_obj.pronoun
 
-{gender_pronoun.title()} {user_obj.first_name}, что было в **{dose_time}**?
+    # Определяем, это последняя доза или нет
+    is_last_dose = (dose_index == total_doses - 1)
 
-⏰ **Доза №{dose_schedule.dose_number} ({dose_schedule.day}-й день)**
+    question_message = _QUESTION_TMPL.format_map({
+        'emoji': current_character.emoji,
+        'n': dose_index + 1,
+        'total': total_doses,
+        'pronoun': gender_pronoun.title(),
+        'name': user_obj.first_name,
+        # ЧЧ:ММ из целых напрямую, без прохода strftime
+        'time': f"{dose_schedule.scheduled_time.hour:02d}:{dose_schedule.scheduled_time.minute:02d}",
+        'dose_number': dose_schedule.dose_number,
+        'day': dose_schedule.day,
+        'char': current_character.name,
+    })
 
-Отвечай честно - {current_character.name} всё равно всё выяснит!
-
-*"Правда выходит наружу рано или поздно."*
-"""
-        
-        # Создаем кнопки
-        buttons = []
-        buttons.append([InlineKeyboardButton("✅ Принял(а)", callback_data=f"catchup_taken_{dose_index}")])
-        buttons.append([InlineKeyboardButton("❌ Пропуск", callback_data=f"catchup_missed_{dose_index}")])
-        
-        # Для последней дозы добавляем вариант отсрочки
-        if is_last_dose:
-            buttons.append([InlineKeyboardButton("⏰ Отложить на 5 мин", callback_data=f"catchup_postpone_{dose_index}")])
-        
-        keyboard = InlineKeyboardMarkup(buttons)
-        
-        # Отправляем новое сообщение (query.edit не подойдет для новой структуры)
-        await query.message.reply_text(
-            question_message,
-            parse_mode='Markdown',
-            reply_markup=keyboard
-        )
-        
-    except Exception as e:
-        logger.error(f"Ошибка при задании вопроса о следующей дозе: {e}")
+    return question_message, _catchup_keyboard(dose_index, is_last_dose)
 
 
 async def _finish_catchup_and_start_program(query, context: ContextTypes.DEFAULT_TYPE, postpone_last: bool = False) -> None:
@@ -415,24 +516,25 @@ async def _finish_catchup_and_start_program(query, context: ContextTypes.DEFAULT
     Завершает режим опроса и запускает обычную программу.
     """
     try:
-        from core.services.reminder_service import reminder_service
+        # Снимаем состояние опроса целиком; после опроса фаза (а с ней
+        # и закэшированный персонаж) может смениться
+        state = context.user_data.pop('catchup', None)
         
-        user_obj = context.user_data.get('user_obj')
-        course_obj = context.user_data.get('course_obj')
-        first_dose_time = context.user_data.get('first_dose_time')
-        
-        if not user_obj or not course_obj or not first_dose_time:
+        if state is None or not state.first_dose_time:
             await query.message.reply_text("❌ Ошибка: данные для запуска программы не найдены")
             return
         
-        # Очищаем режим опроса
-        context.user_data['catchup_mode'] = False
-        context.user_data.pop('overdue_doses', None)
-        context.user_data.pop('current_catchup_index', None)
+        user_obj = state.user_obj
+        course_obj = state.course_obj
+        first_dose_time = state.first_dose_time
+        
+        # Сбрасываем накопленные за опрос записи одной транзакцией
+        if state.pending_logs:
+            await _tabex_repo.bulk_create_logs(state.pending_logs)
         
-        # Получаем персонажа
-        current_character = character_service.get_current_character(course_obj)
-        gender_pronoun = "гражданин" if user_obj.is_male() else "гражданка"
+        current_character = state.current_character \
+            or character_service.get_current_character(course_obj)
+        gender_pronoun = user_obj.pronoun
         
         # Сообщение о завершении опроса
         completion_message = f"""
@@ -456,52 +558,66 @@ async def _finish_catchup_and_start_program(query, context: ContextTypes.DEFAULT
             parse_mode='Markdown'
         )
         
-        # Запускаем систему напоминаний
-        success = await reminder_service.start_reminders_for_user(
-            query.from_user.id, first_dose_time, context.bot
-        )
-        
         if postpone_last:
             # Если была отсрочка - устанавливаем напоминание через 5 минут
-            from datetime import datetime, timedelta
             postponed_time = datetime.now() + timedelta(minutes=5)
             # Используем текущее время как "оригинальное" для catch-up процесса
             original_time = datetime.now()
             reminder_service.postponed_reminders[query.from_user.id] = postponed_time
             reminder_service.postponed_reminders[f"{query.from_user.id}_original_time"] = original_time
-        
+
+        # Запуск напоминаний не влияет на уже отправленный ответ -
+        # выполняем его фоновой задачей, не задерживая обработчик
+        task = asyncio.create_task(
+            _start_reminders_in_background(query, first_dose_time, context)
+        )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+            
+    except Exception as e:
+        logger.error("Ошибка при завершении опроса и запуске программы: %s", e)
+
+
+async def _start_reminders_in_background(query, first_dose_time, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Запускает систему напоминаний после опроса фоновой задачей.
+
+    Args:
+        query: Callback query от Telegram
+        first_dose_time: Время первого приёма
+        context: Контекст обработчика
+    """
+    try:
+        success = await reminder_service.start_reminders_for_user(
+            query.from_user.id, first_dose_time, context.bot
+        )
+
         if success:
-            logger.info(f"Напоминания запущены после опроса для пользователя {query.from_user.id}")
+            logger.info("Напоминания запущены после опроса для пользователя %s", query.from_user.id)
         else:
-            logger.error(f"Ошибка запуска напоминаний после опроса для пользователя {query.from_user.id}")
+            logger.error("Ошибка запуска напоминаний после опроса для пользователя %s", query.from_user.id)
             await query.message.reply_text(
                 "⚠️ Произошла ошибка при запуске напоминаний. Попробуйте команду /start."
             )
-            
+
     except Exception as e:
-        logger.error(f"Ошибка при завершении опроса и запуске программы: {e}")
+        logger.error("Ошибка фонового запуска напоминаний: %s", e)
 
 
-async def _handle_gender_selection(query, context: ContextTypes.DEFAULT_TYPE, callback_data: str) -> None:
+async def _handle_gender_selection(query, context: ContextTypes.DEFAULT_TYPE, arg: str, tail: int) -> None:
     """
     Обработка выбора гендера пользователем.
     
     Args:
         query: Callback query от Telegram
         context: Контекст обработчика
-        callback_data: Данные callback в формате "gender_{male|female}_{user_id}"
+        arg: Пол из callback_data "gender_{male|female}_{user_id}"
+        tail: Telegram ID пользователя, которому адресованы кнопки
     """
     user = query.from_user
     
-    # Парсим callback_data: gender_male_123456 или gender_female_123456
-    parts = callback_data.split('_')
-    if len(parts) != 3:
-        logger.error(f"Некорректный формат callback_data: {callback_data}")
-        await query.edit_message_text("🐺 Рррр! Что-то пошло не так с протоколом!")
-        return
-    
-    gender = parts[1]  # male или female
-    expected_user_id = int(parts[2])
+    gender = sys.intern(arg)  # male или female
+    expected_user_id = tail
     
     # Проверяем, что callback от того же пользователя
     if user.id != expected_user_id:
@@ -510,8 +626,6 @@ async def _handle_gender_selection(query, context: ContextTypes.DEFAULT_TYPE, ca
     
     try:
         # Создаем пользователя в базе данных
-        user_repo = UserRepository()
-        
         new_user = User(
             user_id=None,
             telegram_id=user.id,
@@ -520,20 +634,17 @@ async def _handle_gender_selection(query, context: ContextTypes.DEFAULT_TYPE, ca
             gender=gender
         )
         
-        created_user = await user_repo.create(new_user)
-        
-        # Создаем курс лечения
-        treatment_repo = TreatmentRepository()
-        
         new_course = TreatmentCourse(
             course_id=None,
-            user_id=created_user.user_id,
+            user_id=None,
             start_date=date.today(),
             current_phase=1,
             current_character='gaspode'
         )
-        
-        created_course = await treatment_repo.create(new_course)
+
+        # Пользователь и курс создаются одной транзакцией
+        created_user, created_course = await _user_repo.create_with_course(new_user, new_course)
+        user_cache.invalidate(user.id)
         
         # Получаем персонажа для более точного сообщения
         current_character = character_service.get_character_by_name('gaspode')
@@ -546,14 +657,14 @@ async def _handle_gender_selection(query, context: ContextTypes.DEFAULT_TYPE, ca
             time_instruction = f"""
 
 📝 **А теперь введи время первой таблетки:**
-Когда ты сегодня принял{'' if gender == 'male' else 'а'} первую таблетку Табекса?
+Когда ты сегодня принял{'' if gender is _GENDER_MALE else 'а'} первую таблетку Табекса?
 Формат: **ЧЧ:ММ** (например: 08:30 или 14:15)"""
             
             gaspode_registered = gaspode_greeting + time_instruction
         else:
             # Fallback на старое сообщение
-            gender_display = "мужчина" if gender == "male" else "женщина"
-            gender_pronoun = "гражданин" if gender == "male" else "гражданка"
+            gender_display = "мужчина" if gender is _GENDER_MALE else "женщина"
+            gender_pronoun = _PRONOUN_MALE if gender is _GENDER_MALE else _PRONOUN_FEMALE
             
             gaspode_registered = f"""
 🐺 **Отлично, {gender_pronoun} {user.first_name}!**
@@ -571,23 +682,39 @@ async def _handle_gender_selection(query, context: ContextTypes.DEFAULT_TYPE, ca
 — Гаспод (записал всё в протокол)
 """
         
-        await query.edit_message_text(gaspode_registered, parse_mode='Markdown')
+        await _safe_edit(query, gaspode_registered, parse_mode='Markdown')
         
         # Устанавливаем состояние ожидания времени
-        context.user_data['awaiting_first_dose_time'] = True
+        context.user_data['flow_state'] = FLOW_AWAITING_TIME
         context.user_data['user_obj'] = created_user
         context.user_data['course_obj'] = created_course
         
-        logger.info(f"Создан пользователь {created_user} с гендером {gender} и курс лечения")
+        logger.info("Создан пользователь %s с гендером %s и курс лечения", created_user, gender)
         
     except Exception as e:
-        logger.error(f"Ошибка при создании пользователя и курса: {e}")
-        await query.edit_message_text(
+        logger.error("Ошибка при создании пользователя и курса: %s", e)
+        await _safe_edit(query, 
             "🐺 Рррр! Что-то пошло не так с регистрацией в протоколе Стражи! "
             "Попробуй команду /start еще раз."
         )
 
 
+# Таблица маршрутизации callback'ов: один поиск по ключу
+# вместо цепочки startswith-проверок в button_callback.
+# Final фиксирует таблицу как неизменяемую для инструментов; ключи -
+# литералы, поэтому они уже интернированы компилятором и dict.get
+# сравнивает их по identity
+_ROUTES: Final = {
+    "gender": _handle_gender_selection,
+    "dose_taken": partial(_handle_dose_action, method=reminder_service.handle_dose_taken),
+    "dose_postpone": partial(_handle_dose_action, method=reminder_service.handle_dose_postpone),
+    "dose_skip": partial(_handle_dose_action, method=reminder_service.handle_dose_skip),
+    "catchup_taken": _handle_catchup_taken,
+    "catchup_missed": _handle_catchup_missed,
+    "catchup_postpone": _handle_catchup_postpone,
+}
+
+
 def setup_callback_handlers(app: Application) -> None:
     """
     Регистрация всех обработчиков callback-запросов в приложении.
@@ -596,11 +723,13 @@ def setup_callback_handlers(app: Application) -> None:
         app: Экземпляр Telegram Application для регистрации handlers
     """
     try:
-        # Универсальный обработчик всех callback-запросов
-        app.add_handler(CallbackQueryHandler(button_callback))
+        # Универсальный обработчик всех callback-запросов;
+        # block=False позволяет обрабатывать нажатия разных
+        # пользователей параллельно, не выстраивая их в очередь
+        app.add_handler(CallbackQueryHandler(button_callback, block=False))
         
         logger.info("Обработчики callback-запросов успешно зарегистрированы")
         
     except Exception as e:
-        logger.error(f"Ошибка при регистрации обработчиков callback: {e}")
+        logger.error("Ошибка при регистрации обработчиков callback: %s", e)
         raise
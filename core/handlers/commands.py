@@ -3,73 +3,62 @@
 
 Содержит все команды, доступные пользователям для взаимодействия с ботом.
 """
+import asyncio
 import logging
-import re
-from datetime import datetime, timedelta, date
+from functools import lru_cache, wraps
+from datetime import datetime, timedelta, date, time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 
 from core.models.user import User
 from core.models.treatment import TreatmentCourse
+from core.models.tabex_log import TabexLog, TabexLogStatus
 from core.services.reminder_service import reminder_service
 from core.services.character_service import character_service
+from core.handlers.callbacks import (
+    CatchupState, _catchup_keyboard,
+    FLOW_NONE, FLOW_AWAITING_TIME, FLOW_ACTIVE, FLOW_AWAITING_DELETION
+)
 from core.services.schedule_service import schedule_service
+from core.services.user_cache import user_cache
 from database.repositories import UserRepository, TreatmentRepository, TabexRepository
-from database.connection import init_database
 
 logger = logging.getLogger(__name__)
 
+# Модульные экземпляры репозиториев: конструировать их на каждый
+# Telegram-update незачем - состояния запроса они не хранят
+_user_repo = UserRepository()
+_treatment_repo = TreatmentRepository()
+_tabex_repo = TabexRepository()
 
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+def _parse_time_input(text: str):
     """
-    Обработчик команды /start - арест и допрос у Гаспода.
-    
-    Гаспод арестовывает курильщика и предлагает программу исправления.
-    """
-    user = update.effective_user
-    user_repo = UserRepository()
-    
-    try:
-        # Инициализируем базу данных, если нужно
-        await init_database()
-        
-        # Очищаем флаги ожидания подтверждения удаления (отмена /quit)
-        context.user_data.pop('awaiting_deletion_confirmation', None)
-        context.user_data.pop('user_to_delete', None)
-        
-        # Проверяем, существует ли пользователь
-        existing_user = await user_repo.get_by_telegram_id(user.id)
-        
-        if existing_user:
-            # Пользователь уже зарегистрирован, проверяем активный курс
-            treatment_repo = TreatmentRepository()
-            active_course = await treatment_repo.get_active_by_user_id(existing_user.user_id)
-            
-            if active_course:
-                gaspode_return = f"""
-🐺 **Рррр! Опять ты, {existing_user.first_name}!**
+    Разбирает строку времени ЧЧ:ММ без регулярных выражений.
 
-Гаспод помнит всех нарушителей. У тебя уже есть активная программа исправления!
+    Грамматика настолько простая, что ручной разбор быстрее: одно
+    разбиение по ':' и две конверсии в int на C-уровне.
 
-**Текущий статус:**
-• День лечения: {active_course.days_since_start}
-• Фаза: {active_course.current_phase}  
-• Персонаж: {active_course.current_character}
-
-Не пытайся сбежать! Используй /stats для проверки прогресса.
+    Args:
+        text: Введённая пользователем строка
 
-*"Второй раз попался - значит, не научился с первого раза."*
-"""
-                await update.message.reply_text(gaspode_return, parse_mode='Markdown')
-                return
-            else:
-                # Пользователь есть, но нет активного курса - начинаем новый
-                await _start_new_course_for_existing_user(update, existing_user)
-                return
-        
-        # Новый пользователь - показываем выбор гендера
-        gaspode_arrest = f"""
-🐺 **РРРР! Попался, гражданин {user.first_name}!**
+    Returns:
+        Кортеж (часы, минуты) или None, если формат неверный
+    """
+    hh, sep, mm = text.partition(':')
+    if not sep or not (1 <= len(hh) <= 2) or len(mm) != 2:
+        return None
+    if not (hh.isdigit() and mm.isdigit()):
+        return None
+
+    hours, minutes = int(hh), int(mm)
+    if hours > 23 or minutes > 59:
+        return None
+    return hours, minutes
+
+# Статические тексты и шаблоны сообщений: собираются один раз при
+# импорте, в обработчиках остаётся подстановка значений или отправка
+_GASPODE_ARREST_TMPL = """
+🐺 **РРРР! Попался, гражданин {first_name}!**
 
 Гаспод, дежурный пёс Городской Стражи Анк-Морпорка. Тебя арестовали по подозрению в курении табака в общественном месте!
 
@@ -83,53 +72,9 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
 — Гаспод (арестовавший очередного курильщика)
 """
-        
-        # Создаем inline-клавиатуру для выбора гендера
-        keyboard = [
-            [InlineKeyboardButton("👨 Мужчина", callback_data=f"gender_male_{user.id}")],
-            [InlineKeyboardButton("👩 Женщина", callback_data=f"gender_female_{user.id}")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
-            gaspode_arrest,
-            parse_mode='Markdown',
-            reply_markup=reply_markup
-        )
-        logger.info(f"Гаспод арестовал нового пользователя {user.id} ({user.first_name})")
-        
-    except Exception as e:
-        logger.error(f"Ошибка при обработке /start: {e}")
-        await update.message.reply_text(
-            "🐺 Рррр! Что-то пошло не так с арестом! "
-            "Попробуй еще раз или беги, пока Гаспод не разозлился."
-        )
 
-
-async def _start_new_course_for_existing_user(update: Update, user_obj: User) -> None:
-    """
-    Начинает новый курс лечения для существующего пользователя.
-    
-    Args:
-        update: Объект обновления Telegram
-        user_obj: Объект пользователя из базы данных
-    """
-    try:
-        # Создаем новый курс лечения
-        treatment_repo = TreatmentRepository()
-        
-        new_course = TreatmentCourse(
-            course_id=None,
-            user_id=user_obj.user_id,
-            start_date=date.today(),
-            current_phase=1,
-            current_character='gaspode'
-        )
-        
-        created_course = await treatment_repo.create(new_course)
-        
-        gaspode_new_course = f"""
-🐺 **Ррр, опять за старое, {user_obj.first_name}?**
+_GASPODE_NEW_COURSE_TMPL = """
+🐺 **Ррр, опять за старое, {first_name}?**
 
 Ладно, Гаспод не откажет в повторном шансе. Все курят, все хотят бросить.
 
@@ -142,26 +87,8 @@ async def _start_new_course_for_existing_user(update: Update, user_obj: User) ->
 
 — Гаспод (готов следить снова)
 """
-        
-        await update.message.reply_text(gaspode_new_course, parse_mode='Markdown')
-        
-        logger.info(f"Создан новый курс лечения {created_course} для существующего пользователя {user_obj}")
-        
-    except Exception as e:
-        logger.error(f"Ошибка создания нового курса для пользователя {user_obj.user_id}: {e}")
-        await update.message.reply_text(
-            "🐺 Рррр! Что-то пошло не так с новым курсом! "
-            "Попробуй /start еще раз или беги к ветеринару!"
-        )
 
-
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """
-    Обработчик команды /help - краткая справка от Гаспода.
-    """
-    user = update.effective_user
-    
-    gaspode_help = """
+_GASPODE_HELP = """
 🐺 **Инструкции от Гаспода**
 
 Слушай внимательно, двуногий. Гаспод объясняет только один раз.
@@ -191,32 +118,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
 — Гаспод, Городская Стража (дежурный пёс)
 """
-    
-    try:
-        await update.message.reply_text(
-            gaspode_help,
-            parse_mode='Markdown'
-        )
-        logger.info(f"Гаспод дал инструкции пользователю {user.id} ({user.first_name})")
-        
-    except Exception as e:
-        logger.error(f"Ошибка при отправке справки: {e}")
-        await update.message.reply_text(
-            "🐺 Рррр! Что-то пошло не так с инструкциями! "
-            "Попробуй позже или беги к ветеринару."
-        )
-
 
-async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """
-    Обработчик неизвестных команд.
-    
-    Отвечает пользователю, если он ввёл неизвестную команду.
-    """
-    user = update.effective_user
-    command = update.message.text
-    
-    vimes_unknown = f"""
+_VIMES_UNKNOWN_TMPL = """
 🏴‍☠️ **Что за ерунда, гражданин?**
 
 Команда `{command}` не входит в мои полномочия. 
@@ -230,87 +133,345 @@ async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 *"Если не знаешь, что делать, делай то, что знаешь."*
 """
+
+_GASPODE_TIME_FORMAT_ERROR = """
+🐺 **Ррр, что за собачья чушь?**
+
+Гаспод ясно сказал: формат **ЧЧ:ММ**
+
+Примеры правильного ввода:
+• 08:30
+• 14:15  
+• 09:00
+• 21:45
+
+Попробуй еще раз. Собачье терпение не безгранично.
+
+*"Даже собаки понимают время лучше некоторых людей."*
+"""
+
+_DEATH_WARNING_TMPL = """
+💀 **ВНИМАНИЕ, {first_name}!**
+
+Ты запросил полное удаление из системы Табекс-помощника.
+
+**Это действие:**
+• Удалит ВСЕ твои данные из системы
+• Удалит всю историю лечения  
+• Удалит все курсы и статистику
+• Остановит все напоминания
+• **ДЕЙСТВИЕ НЕОБРАТИМО!**
+
+После удаления ты сможешь начать заново с чистого листа.
+
+**Для подтверждения напиши точно:** `ПОДТВЕРЖДАЮ`
+**Для отмены используй:** `/start`
+
+*"СМЕРТЬ - ЭТО НЕ КОНЕЦ. ЭТО ПРОСТО... ОЧЕНЬ НЕУДОБНО."*
+
+— СМЕРТЬ (готов стереть твоё досье)
+"""
+
+_DEATH_FAREWELL = """
+💀 **ГОТОВО.**
+
+СМЕРТЬ выполнил твою просьбу. Твоё досье стёрто из архивов Стражи.
+
+**Что произошло:**
+✅ Удалены все курсы лечения
+✅ Удалена вся статистика
+✅ Удалена история взаимодействий  
+✅ Остановлены все напоминания
+✅ Стёрта твоя учётная запись
+
+Теперь ты можешь начать заново. Используй `/start` когда будешь готов к новой программе исправления.
+
+*"НЕКОТОРЫЕ ЛЮДИ ДУМАЮТ, ЧТО СМЕРТЬ ЖЕСТОК. НО НА САМОМ ДЕЛЕ СМЕРТЬ ДАЁТ ВТОРОЙ ШАНС."*
+
+— СМЕРТЬ (архивариус забвения)
+
+**Увидимся снова, когда решишь вернуться...**
+"""
+
+
+
+def _handler_errors(fallback_message: str):
+    """
+    Декоратор: единый try/except для обработчиков без локального
+    восстановления.
+
+    Логирует исключение со стектрейсом (logger.exception вместо
+    потерянного в f-строке traceback'а) и отвечает пользователю
+    заданным запасным сообщением.
+
+    Args:
+        fallback_message: Текст ответа пользователю при ошибке
+
+    Returns:
+        Декоратор для async-обработчика (update, context)
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+            try:
+                return await handler(update, context)
+            except Exception:
+                logger.exception("Ошибка в обработчике %s", handler.__name__)
+                try:
+                    await update.message.reply_text(fallback_message)
+                except Exception:
+                    logger.error("Не удалось отправить сообщение об ошибке пользователю %s",
+                                 update.effective_user.id if update.effective_user else None)
+        return wrapper
+    return decorator
+
+
+def _clear_deletion_state(user_data) -> None:
+    """
+    Снимает ожидание подтверждения удаления и связанный с ним ключ.
+
+    Единая точка очистки: при добавлении новых ключей состояния
+    удаления их достаточно сбросить здесь.
+
+    Args:
+        user_data: context.user_data пользователя
+    """
+    if user_data.get('flow_state') == FLOW_AWAITING_DELETION:
+        user_data['flow_state'] = FLOW_NONE
+    user_data.pop('user_to_delete', None)
+
+
+@lru_cache(maxsize=2048)
+def _render_arrest_message(first_name: str) -> str:
+    """
+    Рендерит приветствие ареста для указанного имени.
+
+    Повторный /start от того же имени - попадание в кэш вместо
+    повторной сборки полуторакилобайтной строки. Размер кэша ограничен,
+    чтобы поток новых имён не раздувал память.
+
+    Args:
+        first_name: Имя пользователя
+
+    Returns:
+        Готовый текст приветствия
+    """
+    return _GASPODE_ARREST_TMPL.format(first_name=first_name)
+
+
+@lru_cache(maxsize=2048)
+def _render_unknown_command_message(command: str) -> str:
+    """
+    Рендерит ответ на неизвестную команду.
+
+    Args:
+        command: Введённая пользователем команда
+
+    Returns:
+        Готовый текст ответа
+    """
+    return _VIMES_UNKNOWN_TMPL.format(command=command)
+
+
+@_handler_errors(
+    "🐺 Рррр! Что-то пошло не так с арестом! "
+    "Попробуй еще раз или беги, пока Гаспод не разозлился."
+)
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /start - арест и допрос у Гаспода.
+    
+    Гаспод арестовывает курильщика и предлагает программу исправления.
+    """
+    user = update.effective_user
+    
+    # Сбрасываем ожидание подтверждения удаления (отмена /quit)
+    _clear_deletion_state(context.user_data)
+    
+    # Проверяем, существует ли пользователь; пара "пользователь +
+    # активный курс" берётся из короткоживущего кэша
+    existing_user, active_course = await user_cache.get_user_and_course(user.id)
+    
+    if existing_user:
+        if active_course:
+            gaspode_return = f"""
+🐺 **Рррр! Опять ты, {existing_user.first_name}!**
+
+Гаспод помнит всех нарушителей. У тебя уже есть активная программа исправления!
+
+**Текущий статус:**
+• День лечения: {active_course.days_since_start}
+• Фаза: {active_course.current_phase}  
+• Персонаж: {active_course.current_character}
+
+Не пытайся сбежать! Используй /stats для проверки прогресса.
+
+*"Второй раз попался - значит, не научился с первого раза."*
+"""
+            await update.message.reply_text(gaspode_return, parse_mode='Markdown')
+            return
+        else:
+            # Пользователь есть, но нет активного курса - начинаем новый
+            await _start_new_course_for_existing_user(update, existing_user)
+            return
     
+    # Новый пользователь - показываем выбор гендера
+    
+    gaspode_arrest = _render_arrest_message(user.first_name)
+    
+    # Создаем inline-клавиатуру для выбора гендера
+    keyboard = [
+        [InlineKeyboardButton("👨 Мужчина", callback_data=f"gender_male_{user.id}")],
+        [InlineKeyboardButton("👩 Женщина", callback_data=f"gender_female_{user.id}")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    
+    await update.message.reply_text(
+        gaspode_arrest,
+        parse_mode='Markdown',
+        reply_markup=reply_markup
+    )
+    logger.info("Гаспод арестовал нового пользователя %s (%s)", user.id, user.first_name)
+    
+async def _start_new_course_for_existing_user(update: Update, user_obj: User) -> None:
+    """
+    Начинает новый курс лечения для существующего пользователя.
+    
+    Args:
+        update: Объект обновления Telegram
+        user_obj: Объект пользователя из базы данных
+    """
     try:
-        await update.message.reply_text(
-            vimes_unknown,
-            parse_mode='Markdown'
+        # Создаем новый курс лечения
+        
+        new_course = TreatmentCourse(
+            course_id=None,
+            user_id=user_obj.user_id,
+            start_date=date.today(),
+            current_phase=1,
+            current_character='gaspode'
         )
-        logger.info(f"Капитан Ваймс не понял команду '{command}' от пользователя {user.id}")
+        
+        created_course = await _treatment_repo.create(new_course)
+        user_cache.invalidate(user_obj.telegram_id)
+        
+        gaspode_new_course = _GASPODE_NEW_COURSE_TMPL.format(first_name=user_obj.first_name)
+        
+        await update.message.reply_text(gaspode_new_course, parse_mode='Markdown')
+        
+        logger.info("Создан новый курс лечения %s для существующего пользователя %s", created_course, user_obj)
         
     except Exception as e:
-        logger.error(f"Ошибка при обработке неизвестной команды: {e}")
+        logger.error("Ошибка создания нового курса для пользователя %s: %s", user_obj.user_id, e)
+        await update.message.reply_text(
+            "🐺 Рррр! Что-то пошло не так с новым курсом! "
+            "Попробуй /start еще раз или беги к ветеринару!"
+        )
+
+
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /help - краткая справка от Гаспода.
+    """
+    user = update.effective_user
+    
+    # Локального восстановления здесь нет - сбой отправки обработает
+    # глобальный error handler приложения
+    await update.message.reply_text(
+        _GASPODE_HELP,
+        parse_mode='Markdown'
+    )
+    logger.info("Гаспод дал инструкции пользователю %s (%s)", user.id, user.first_name)
+
+
+async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик неизвестных команд.
+    
+    Отвечает пользователю, если он ввёл неизвестную команду.
+    """
+    user = update.effective_user
+    command = update.message.text
+    
+    vimes_unknown = _render_unknown_command_message(command)
+    
+    await update.message.reply_text(
+        vimes_unknown,
+        parse_mode='Markdown'
+    )
+    logger.info("Капитан Ваймс не понял команду '%s' от пользователя %s", command, user.id)
 
 
+@_handler_errors(
+    "⚠️ Произошла ошибка при получении статистики. "
+    "Попробуйте позже или обратитесь к администратору."
+)
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Обработчик команды /stats - статистика прогресса от текущего персонажа.
     """
     user = update.effective_user
     
-    try:
-        await init_database()
-        
-        # Получаем данные пользователя и курса
-        user_repo = UserRepository()
-        user_obj = await user_repo.get_by_telegram_id(user.id)
-        
-        if not user_obj:
-            await update.message.reply_text(
-                "❓ Ты не зарегистрирован в системе. Начни с команды /start"
-            )
-            return
-        
-        treatment_repo = TreatmentRepository()
-        active_course = await treatment_repo.get_active_by_user_id(user_obj.user_id)
-        
-        if not active_course:
-            await update.message.reply_text(
-                "❓ У тебя нет активного курса лечения. Начни новый с команды /start"
-            )
-            return
-        
-        # Получаем текущего персонажа
-        current_character = character_service.get_current_character(active_course)
-        
-        # Получаем статистику из базы данных
-        tabex_repo = TabexRepository()
-        all_logs = await tabex_repo.get_logs_by_course_id(active_course.course_id)
-        
-        # Вычисляем статистику - правильный подсчет запланированных доз
-        taken_count = sum(1 for log in all_logs if log.is_taken)
-        missed_count = sum(1 for log in all_logs if log.is_missed or log.is_skipped)
-        
-        # Считаем реально запланированные дозы на основе дней курса и фаз
-        days_passed = active_course.days_since_start
-        total_scheduled = 0
-        
-        # Получаем время первой дозы из логов для правильного расчета
-        first_dose_time = "09:00"  # По умолчанию
-        if all_logs:
-            earliest_log = min(all_logs, key=lambda x: x.scheduled_time)
-            first_dose_time = earliest_log.scheduled_time.strftime("%H:%M")
-        
-        # Считаем запланированные дозы за каждый прошедший день
-        for day in range(1, days_passed + 1):
-            daily_schedule = schedule_service.calculate_daily_schedule(active_course, first_dose_time, day)
-            # Считаем только дозы которые уже должны были произойти
-            now = datetime.now()
-            for dose in daily_schedule:
-                if dose.scheduled_time <= now:
-                    total_scheduled += 1
-        
-        compliance_percent = int((taken_count / max(total_scheduled, 1)) * 100)
-        
-        # Определяем, бросил ли курить (5-й день прошел)
-        quit_smoking_info = ""
-        if days_passed >= 5:
-            quit_date = active_course.smoking_quit_date or (active_course.start_date + timedelta(days=4))
-            days_smoke_free = (date.today() - quit_date).days + 1
-            quit_smoking_info = f"🚭 **Дни без курения:** {days_smoke_free}\n"
-        
-        # Генерируем отчет от персонажа
-        stats_message = f"""
+    # Получаем данные пользователя и курса (кэш с коротким TTL)
+    user_obj, active_course = await user_cache.get_user_and_course(user.id)
+    
+    if not user_obj:
+        await update.message.reply_text(
+            "❓ Ты не зарегистрирован в системе. Начни с команды /start"
+        )
+        return
+    
+    if not active_course:
+        await update.message.reply_text(
+            "❓ У тебя нет активного курса лечения. Начни новый с команды /start"
+        )
+        return
+    
+    # Один снимок часов на весь обработчик: days_since_start
+    # и расчёт дней без курения считаются от одной и той же даты,
+    # без повторных обращений к date.today()
+    now = datetime.now()
+    today = now.date()
+    
+    # Получаем текущего персонажа
+    current_character = character_service.get_current_character(active_course)
+    
+    # Счётчики и время самой ранней дозы агрегирует база -
+    # выгружать все записи курса ради трёх значений не нужно
+    taken_count, missed_count, earliest = await _tabex_repo.get_stats_by_course_id(active_course.course_id)
+    
+    # Считаем реально запланированные дозы на основе дней курса и фаз
+    # (days_since_start развёрнут по месту, чтобы не дёргать
+    # date.today() внутри свойства ещё раз)
+    days_passed = (today - active_course.start_date).days + 1
+    total_scheduled = 0
+    
+    # Время первой дозы для правильного расчета
+    first_dose_time = "09:00"  # По умолчанию
+    if earliest is not None:
+        # ЧЧ:ММ собирается из целых напрямую - без прохода strftime
+        first_dose_time = f"{earliest.hour:02d}:{earliest.minute:02d}"
+    
+    
+    # Считаем запланированные дозы за каждый прошедший день
+    for day in range(1, days_passed + 1):
+        daily_schedule = schedule_service.calculate_daily_schedule(active_course, first_dose_time, day)
+        # Считаем только дозы которые уже должны были произойти
+        for dose in daily_schedule:
+            if dose.scheduled_time <= now:
+                total_scheduled += 1
+    
+    compliance_percent = int((taken_count / max(total_scheduled, 1)) * 100)
+    
+    # Определяем, бросил ли курить (5-й день прошел)
+    quit_smoking_info = ""
+    if days_passed >= 5:
+        quit_date = active_course.smoking_quit_date or (active_course.start_date + timedelta(days=4))
+        days_smoke_free = (today - quit_date).days + 1
+        quit_smoking_info = f"🚭 **Дни без курения:** {days_smoke_free}\n"
+    
+    # Генерируем отчет от персонажа
+    stats_message = f"""
 {current_character.emoji} **Отчет {current_character.name} о твоем прогрессе**
 
 📊 **Статистика программы исправления:**
@@ -327,21 +488,13 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
 *{current_character.get_encouragement_message(user_obj.first_name, user_obj.gender, compliance_percent)}*
 """
-        
-        await update.message.reply_text(
-            stats_message,
-            parse_mode='Markdown'
-        )
-        logger.info(f"{current_character.name} показал статистику пользователю {user.id}")
-        
-    except Exception as e:
-        logger.error(f"Ошибка при отправке статистики: {e}")
-        await update.message.reply_text(
-            "⚠️ Произошла ошибка при получении статистики. "
-            "Попробуйте позже или обратитесь к администратору."
-        )
-
-
+    
+    await update.message.reply_text(
+        stats_message,
+        parse_mode='Markdown'
+    )
+    logger.info("%s показал статистику пользователю %s", current_character.name, user.id)
+    
 async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Обработчик текстовых сообщений от пользователей.
@@ -351,10 +504,17 @@ async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
     - Ввод времени первого приёма таблетки
     """
     user = update.effective_user
+    
+    # Подавляющее большинство текстовых сообщений не относится ни к
+    # одному из ожидаемых вводов - отсекаем их до обращения к тексту
+    flow_state = context.user_data.get('flow_state', FLOW_NONE)
+    if flow_state != FLOW_AWAITING_DELETION and flow_state != FLOW_AWAITING_TIME:
+        return  # Это не ожидаемый ввод, игнорируем
+    
     text = update.message.text.strip()
     
     # Проверяем подтверждение удаления
-    if context.user_data.get('awaiting_deletion_confirmation'):
+    if flow_state == FLOW_AWAITING_DELETION:
         if text == "ПОДТВЕРЖДАЮ":
             await handle_deletion_confirmation(update, context)
             return
@@ -366,36 +526,17 @@ async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
             )
             return
     
-    # Проверяем, ожидаем ли мы ввод времени от этого пользователя
-    if not context.user_data.get('awaiting_first_dose_time'):
-        return  # Это не ввод времени, игнорируем
+    # Сюда доходит только ожидаемый ввод времени первого приёма
+    # Проверяем формат времени ЧЧ:ММ
+    parsed = _parse_time_input(text)
     
-    # Паттерн для времени в формате ЧЧ:ММ
-    time_pattern = r'^([01]?[0-9]|2[0-3]):([0-5][0-9])$'
-    match = re.match(time_pattern, text)
-    
-    if not match:
-        gaspode_error = """
-🐺 **Ррр, что за собачья чушь?**
-
-Гаспод ясно сказал: формат **ЧЧ:ММ**
-
-Примеры правильного ввода:
-• 08:30
-• 14:15  
-• 09:00
-• 21:45
-
-Попробуй еще раз. Собачье терпение не безгранично.
-
-*"Даже собаки понимают время лучше некоторых людей."*
-"""
-        await update.message.reply_text(gaspode_error, parse_mode='Markdown')
+    if parsed is None:
+        await update.message.reply_text(_GASPODE_TIME_FORMAT_ERROR, parse_mode='Markdown')
         return
     
     try:
         # Время корректное, обрабатываем
-        hours, minutes = int(match.group(1)), int(match.group(2))
+        hours, minutes = parsed
         first_dose_time = f"{hours:02d}:{minutes:02d}"
         
         # Получаем данные пользователя и курса из context
@@ -404,8 +545,7 @@ async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         
         if not user_obj:
             # Если нет данных пользователя в контексте, попробуем получить из БД
-            user_repo = UserRepository()
-            user_obj = await user_repo.get_by_telegram_id(user.id)
+            user_obj = await _user_repo.get_by_telegram_id(user.id)
             
             if not user_obj:
                 await update.message.reply_text(
@@ -415,8 +555,7 @@ async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         
         if not course_obj:
             # Если нет данных курса, получаем активный курс из БД
-            treatment_repo = TreatmentRepository()
-            course_obj = await treatment_repo.get_active_by_user_id(user_obj.user_id)
+            course_obj = await _treatment_repo.get_active_by_user_id(user_obj.user_id)
             
             if not course_obj:
                 await update.message.reply_text(
@@ -426,19 +565,16 @@ async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         
         # Сохраняем время в пользовательских данных
         context.user_data['first_dose_time'] = first_dose_time
-        context.user_data['awaiting_first_dose_time'] = False
-        context.user_data['program_started'] = True
+        context.user_data['flow_state'] = FLOW_ACTIVE
         
         # Получаем текущего персонажа (должен быть Гаспод)
         current_character = character_service.get_current_character(course_obj)
         
         # Создаем запись о принятой первой дозе
-        from core.models.tabex_log import TabexLog, TabexLogStatus
-        from database.repositories import TabexRepository
-        
-        tabex_repo = TabexRepository()
         now = datetime.now()
-        first_time = datetime.combine(now.date(), datetime.strptime(first_dose_time, "%H:%M").time())
+        # Часы и минуты уже разобраны - собираем время напрямую,
+        # без обратного прохода через strptime
+        first_time = datetime.combine(now.date(), time(hours, minutes))
         
         # Создаем запись о первой дозе как принятой
         first_dose_log = TabexLog(
@@ -450,8 +586,8 @@ async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
             phase=course_obj.current_phase,
             character_response=f"{current_character.name} записал первый приём в {first_dose_time}"
         )
-        await tabex_repo.create_log(first_dose_log)
-        logger.info(f"Создана запись о первой дозе в {first_dose_time} для пользователя {user_obj.telegram_id}")
+        await _tabex_repo.create_log(first_dose_log)
+        logger.info("Создана запись о первой дозе в %s для пользователя %s", first_dose_time, user_obj.telegram_id)
         
         if first_time < now:
             # Время уже прошло сегодня - ищем пропущенные дозы
@@ -467,7 +603,7 @@ async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await _start_normal_program(update, context, user_obj, course_obj, current_character, first_dose_time)
         
     except Exception as e:
-        logger.error(f"Ошибка при подтверждении времени: {e}")
+        logger.error("Ошибка при подтверждении времени: %s", e)
         await update.message.reply_text(
             "🐺 Рррр! Что-то пошло не так с записью времени! "
             "Попробуй /start еще раз или беги к ветеринару!"
@@ -490,21 +626,15 @@ async def _start_interactive_catchup(update: Update, context: ContextTypes.DEFAU
         first_dose_time: Время первой дозы
     """
     try:
-        gender_pronoun = "гражданин" if user_obj.is_male() else "гражданка"
-        
-        # Сохраняем состояние для callback'ов
-        context.user_data['catchup_mode'] = True
-        context.user_data['overdue_doses'] = overdue_doses
-        context.user_data['current_catchup_index'] = 0
-        context.user_data['first_dose_time'] = first_dose_time
-        
+        gender_pronoun = user_obj.pronoun
+
         # Сообщение о начале опроса
         intro_message = f"""
 {current_character.emoji} **Стоп, {gender_pronoun} {user_obj.first_name}!**
 
 {current_character.name} заметил: с **{first_dose_time}** уже прошло время для **{len(overdue_doses)} доз**!
 
-Нужно выяснить - что ты делал{"" if user_obj.gender == "male" else "а"} всё это время.
+Нужно выяснить - что ты делал{user_obj.past_tense_suffix} всё это время.
 
 **Сейчас проведём допрос по каждой пропущенной дозе.**
 
@@ -513,16 +643,32 @@ async def _start_interactive_catchup(update: Update, context: ContextTypes.DEFAU
 — {current_character.name} (начинает расследование)
 """
         
-        await update.message.reply_text(
-            intro_message,
-            parse_mode='Markdown'
+        # Вступление уходит в сеть фоном, пока готовится состояние
+        # опроса; перед отправкой первого вопроса задача ожидается,
+        # чтобы сохранить порядок сообщений в чате
+        intro_task = asyncio.create_task(
+            update.message.reply_text(intro_message, parse_mode='Markdown')
         )
-        
+
+        # Сохраняем состояние для callback'ов одним slotted-объектом:
+        # обработчики нажатий читают его атрибуты вместо набора ключей.
+        # Персонаж не меняется в пределах одного опроса - вычисляем
+        # его один раз и переиспользуем в обработчиках callback'ов
+        context.user_data['catchup'] = CatchupState(
+            overdue_doses=overdue_doses,
+            user_obj=user_obj,
+            course_obj=course_obj,
+            first_dose_time=first_dose_time,
+            current_character=current_character
+        )
+
+        await intro_task
+
         # Запускаем опрос по первой дозе
         await _ask_about_dose(update, context, user_obj, overdue_doses[0], 0, len(overdue_doses), current_character)
         
     except Exception as e:
-        logger.error(f"Ошибка при запуске интерактивного опроса: {e}")
+        logger.error("Ошибка при запуске интерактивного опроса: %s", e)
         await update.message.reply_text(
             "🐺 Рррр! Что-то пошло не так с опросом! "
             "Попробуй /start еще раз или беги к ветеринару!"
@@ -545,8 +691,9 @@ async def _ask_about_dose(update: Update, context: ContextTypes.DEFAULT_TYPE,
         current_character: Текущий персонаж
     """
     try:
-        gender_pronoun = "гражданин" if user_obj.is_male() else "гражданка"
-        dose_time = dose_schedule.scheduled_time.strftime("%H:%M")
+        gender_pronoun = user_obj.pronoun
+        scheduled = dose_schedule.scheduled_time
+        dose_time = f"{scheduled.hour:02d}:{scheduled.minute:02d}"
         
         # Определяем, это последняя (самая актуальная) доза или нет
         is_last_dose = (dose_index == total_doses - 1)
@@ -563,16 +710,8 @@ async def _ask_about_dose(update: Update, context: ContextTypes.DEFAULT_TYPE,
 *"Правда выходит наружу рано или поздно."*
 """
         
-        # Создаем кнопки
-        buttons = []
-        buttons.append([InlineKeyboardButton("✅ Принял(а)", callback_data=f"catchup_taken_{dose_index}")])
-        buttons.append([InlineKeyboardButton("❌ Пропуск", callback_data=f"catchup_missed_{dose_index}")])
-        
-        # Для последней дозы добавляем вариант отсрочки
-        if is_last_dose:
-            buttons.append([InlineKeyboardButton("⏰ Отложить на 5 мин", callback_data=f"catchup_postpone_{dose_index}")])
-        
-        keyboard = InlineKeyboardMarkup(buttons)
+        # Клавиатура берётся из пула, собранного при импорте callbacks
+        keyboard = _catchup_keyboard(dose_index, is_last_dose)
         
         await update.message.reply_text(
             question_message,
@@ -581,7 +720,7 @@ async def _ask_about_dose(update: Update, context: ContextTypes.DEFAULT_TYPE,
         )
         
     except Exception as e:
-        logger.error(f"Ошибка при задании вопроса о дозе: {e}")
+        logger.error("Ошибка при задании вопроса о дозе: %s", e)
 
 
 async def _start_normal_program(update: Update, context: ContextTypes.DEFAULT_TYPE,
@@ -599,7 +738,7 @@ async def _start_normal_program(update: Update, context: ContextTypes.DEFAULT_TY
         first_dose_time: Время первой дозы
     """
     try:
-        gender_pronoun = "гражданин" if user_obj.is_male() else "гражданка"
+        gender_pronoun = user_obj.pronoun
         
         gaspode_confirmation = f"""
 {current_character.emoji} **Отлично, {gender_pronoun} {user_obj.first_name}!**
@@ -617,24 +756,24 @@ async def _start_normal_program(update: Update, context: ContextTypes.DEFAULT_TY
 **Используй /stats для контроля прогресса.**
 """
         
-        await update.message.reply_text(
-            gaspode_confirmation, 
-            parse_mode='Markdown'
+        # Подтверждение пользователю и запуск системы напоминаний
+        # независимы - выполняем их параллельно, перекрывая round-trip
+        # к Telegram работой планировщика напоминаний
+        _, success = await asyncio.gather(
+            update.message.reply_text(gaspode_confirmation, parse_mode='Markdown'),
+            reminder_service.start_reminders_for_user(user_obj.telegram_id, first_dose_time, context.bot)
         )
-        logger.info(f"Пользователь {user_obj.telegram_id} установил время первого приёма: {first_dose_time}")
-        
-        # Запускаем систему напоминаний
-        success = await reminder_service.start_reminders_for_user(user_obj.telegram_id, first_dose_time, context.bot)
+        logger.info("Пользователь %s установил время первого приёма: %s", user_obj.telegram_id, first_dose_time)
         if success:
-            logger.info(f"Напоминания успешно запущены для пользователя {user_obj.telegram_id}")
+            logger.info("Напоминания успешно запущены для пользователя %s", user_obj.telegram_id)
         else:
-            logger.error(f"Ошибка запуска напоминаний для пользователя {user_obj.telegram_id}")
+            logger.error("Ошибка запуска напоминаний для пользователя %s", user_obj.telegram_id)
             await update.message.reply_text(
                 "⚠️ Произошла ошибка при запуске напоминаний. Попробуйте перезапустить команду /start."
             )
             
     except Exception as e:
-        logger.error(f"Ошибка при запуске обычной программы: {e}")
+        logger.error("Ошибка при запуске обычной программы: %s", e)
 
 
 async def handle_deletion_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -653,68 +792,38 @@ async def handle_deletion_confirmation(update: Update, context: ContextTypes.DEF
             )
             return
         
-        # Получаем все репозитории
-        user_repo = UserRepository()
-        treatment_repo = TreatmentRepository()
-        tabex_repo = TabexRepository()
-        
         # Останавливаем напоминания
         await reminder_service.stop_reminders_for_user(user.id)
         
-        # Удаляем данные в правильном порядке (от зависимых к независимым)
-        # 1. Удаляем записи приёмов и взаимодействия (зависят от курсов)
-        await tabex_repo.delete_all_logs_for_user(user_id_to_delete)
-        await tabex_repo.delete_all_interactions_for_user(user_id_to_delete)
-        
-        # 2. Удаляем курсы лечения (зависят от пользователя)
-        await treatment_repo.delete_all_by_user_id(user_id_to_delete)
-        
-        # 3. Удаляем самого пользователя
-        await user_repo.delete(user_id_to_delete)
+        # Все данные пользователя удаляются одной транзакцией -
+        # один round-trip к базе и никаких полуудалённых состояний
+        await _user_repo.cascade_delete(user_id_to_delete)
+        user_cache.invalidate(user.id)
         
         # Очищаем данные контекста
         context.user_data.clear()
         
-        death_farewell = """
-💀 **ГОТОВО.**
-
-СМЕРТЬ выполнил твою просьбу. Твоё досье стёрто из архивов Стражи.
-
-**Что произошло:**
-✅ Удалены все курсы лечения
-✅ Удалена вся статистика
-✅ Удалена история взаимодействий  
-✅ Остановлены все напоминания
-✅ Стёрта твоя учётная запись
-
-Теперь ты можешь начать заново. Используй `/start` когда будешь готов к новой программе исправления.
-
-*"НЕКОТОРЫЕ ЛЮДИ ДУМАЮТ, ЧТО СМЕРТЬ ЖЕСТОК. НО НА САМОМ ДЕЛЕ СМЕРТЬ ДАЁТ ВТОРОЙ ШАНС."*
-
-— СМЕРТЬ (архивариус забвения)
-
-**Увидимся снова, когда решишь вернуться...**
-"""
-        
         await update.message.reply_text(
-            death_farewell,
+            _DEATH_FAREWELL,
             parse_mode='Markdown'
         )
         
-        logger.info(f"Пользователь {user.id} полностью удален из системы")
+        logger.info("Пользователь %s полностью удален из системы", user.id)
         
     except Exception as e:
-        logger.error(f"Ошибка при удалении пользователя {user.id}: {e}")
+        logger.error("Ошибка при удалении пользователя %s: %s", user.id, e)
         await update.message.reply_text(
             "💀 **ОШИБКА СМЕРТИ**\n\n"
             "Что-то пошло не так при стирании досье. "
             "Попробуй позже или обратись к администратору."
         )
-        # Очищаем флаг ожидания даже при ошибке
-        context.user_data.pop('awaiting_deletion_confirmation', None)
-        context.user_data.pop('user_to_delete', None)
+        # Снимаем ожидание подтверждения даже при ошибке
+        _clear_deletion_state(context.user_data)
 
 
+@_handler_errors(
+    "⚠️ Произошла ошибка. Попробуйте позже или обратитесь к администратору."
+)
 async def quit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Обработчик команды /quit - полное удаление пользователя из системы.
@@ -723,67 +832,36 @@ async def quit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     """
     user = update.effective_user
     
-    try:
-        await init_database()
-        
-        # Получаем данные пользователя
-        user_repo = UserRepository()
-        user_obj = await user_repo.get_by_telegram_id(user.id)
-        
-        if not user_obj:
-            await update.message.reply_text(
-                "❓ Ты не зарегистрирован в системе. Нечего удалять."
-            )
-            return
-        
-        # Проверяем, не ждем ли мы уже подтверждение от этого пользователя
-        if context.user_data.get('awaiting_deletion_confirmation'):
-            await update.message.reply_text(
-                "⚠️ Я уже жду твоего подтверждения. Напиши **ПОДТВЕРЖДАЮ** или /start чтобы отменить.",
-                parse_mode='Markdown'
-            )
-            return
-        
-        # Устанавливаем флаг ожидания подтверждения
-        context.user_data['awaiting_deletion_confirmation'] = True
-        context.user_data['user_to_delete'] = user_obj.user_id
-        
-        warning_message = f"""
-💀 **ВНИМАНИЕ, {user_obj.first_name}!**
-
-Ты запросил полное удаление из системы Табекс-помощника.
-
-**Это действие:**
-• Удалит ВСЕ твои данные из системы
-• Удалит всю историю лечения  
-• Удалит все курсы и статистику
-• Остановит все напоминания
-• **ДЕЙСТВИЕ НЕОБРАТИМО!**
-
-После удаления ты сможешь начать заново с чистого листа.
-
-**Для подтверждения напиши точно:** `ПОДТВЕРЖДАЮ`
-**Для отмены используй:** `/start`
-
-*"СМЕРТЬ - ЭТО НЕ КОНЕЦ. ЭТО ПРОСТО... ОЧЕНЬ НЕУДОБНО."*
-
-— СМЕРТЬ (готов стереть твоё досье)
-"""
-        
+    # Получаем данные пользователя
+    user_obj, _ = await user_cache.get_user_and_course(user.id)
+    
+    if not user_obj:
         await update.message.reply_text(
-            warning_message,
-            parse_mode='Markdown'
+            "❓ Ты не зарегистрирован в системе. Нечего удалять."
         )
-        
-        logger.info(f"Пользователь {user.id} запросил удаление данных, ждем подтверждения")
-        
-    except Exception as e:
-        logger.error(f"Ошибка при инициации удаления пользователя: {e}")
+        return
+    
+    # Проверяем, не ждем ли мы уже подтверждение от этого пользователя
+    if context.user_data.get('flow_state') == FLOW_AWAITING_DELETION:
         await update.message.reply_text(
-            "⚠️ Произошла ошибка. Попробуйте позже или обратитесь к администратору."
+            "⚠️ Я уже жду твоего подтверждения. Напиши **ПОДТВЕРЖДАЮ** или /start чтобы отменить.",
+            parse_mode='Markdown'
         )
-
-
+        return
+    
+    # Устанавливаем флаг ожидания подтверждения
+    context.user_data['flow_state'] = FLOW_AWAITING_DELETION
+    context.user_data['user_to_delete'] = user_obj.user_id
+    
+    warning_message = _DEATH_WARNING_TMPL.format(first_name=user_obj.first_name)
+    
+    await update.message.reply_text(
+        warning_message,
+        parse_mode='Markdown'
+    )
+    
+    logger.info("Пользователь %s запросил удаление данных, ждем подтверждения", user.id)
+    
 def setup_command_handlers(app: Application) -> None:
     """
     Регистрация всех обработчиков команд в приложении.
@@ -792,14 +870,6 @@ def setup_command_handlers(app: Application) -> None:
         app: Экземпляр Telegram Application для регистрации handlers
     """
     try:
-        # MVP команды от капитана Ваймса
-        app.add_handler(CommandHandler("start", start_command))
-        app.add_handler(CommandHandler("help", help_command))
-        app.add_handler(CommandHandler("stats", stats_command))
-        
-        # Команда завершения курса досрочно
-        app.add_handler(CommandHandler("quit", quit_command))
-        
         # Админские команды для тестирования
         from .admin_commands import (
             admin_jump_day_command, admin_set_phase_command, 
@@ -807,18 +877,28 @@ def setup_command_handlers(app: Application) -> None:
             admin_reset_course_command, admin_help_command
         )
         
-        app.add_handler(CommandHandler("admin_jump_day", admin_jump_day_command))
-        app.add_handler(CommandHandler("admin_set_phase", admin_set_phase_command))
-        app.add_handler(CommandHandler("admin_test_gender", admin_test_gender_command))
-        app.add_handler(CommandHandler("admin_simulate_course", admin_simulate_full_course_command))
-        app.add_handler(CommandHandler("admin_reset_course", admin_reset_course_command))
-        app.add_handler(CommandHandler("admin_help", admin_help_command))
-        
-        # Обработчик текстовых сообщений (время, подтверждение удаления)
-        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_input))
+        # Один вызов add_handlers вместо дюжины add_handler:
+        # регистрация проходит списком за один обход
+        app.add_handlers([
+            # MVP команды от капитана Ваймса
+            CommandHandler("start", start_command),
+            CommandHandler("help", help_command),
+            CommandHandler("stats", stats_command),
+            # Команда завершения курса досрочно
+            CommandHandler("quit", quit_command),
+            # Админские команды
+            CommandHandler("admin_jump_day", admin_jump_day_command),
+            CommandHandler("admin_set_phase", admin_set_phase_command),
+            CommandHandler("admin_test_gender", admin_test_gender_command),
+            CommandHandler("admin_simulate_course", admin_simulate_full_course_command),
+            CommandHandler("admin_reset_course", admin_reset_course_command),
+            CommandHandler("admin_help", admin_help_command),
+            # Обработчик текстовых сообщений (время, подтверждение удаления)
+            MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_input),
+        ])
         
         logger.info("Обработчики команд успешно зарегистрированы (включая админские)")
         
     except Exception as e:
-        logger.error(f"Ошибка при регистрации обработчиков команд: {e}")
+        logger.error("Ошибка при регистрации обработчиков команд: %s", e)
         raise
@@ -6,6 +6,7 @@
 """
 from dataclasses import dataclass
 from datetime import datetime
+from functools import cached_property
 from typing import Optional
 
 
@@ -55,6 +56,20 @@ class User:
         """Проверка, является ли пользователь женщиной."""
         return self.gender == 'female'
     
+    @cached_property
+    def pronoun(self) -> str:
+        """Обращение Стражи к пользователю: "гражданин"/"гражданка".
+
+        Гендер после создания не меняется, поэтому значение
+        вычисляется один раз на время жизни объекта.
+        """
+        return "гражданин" if self.is_male() else "гражданка"
+
+    @cached_property
+    def past_tense_suffix(self) -> str:
+        """Суффикс прошедшего времени: "" для мужчин, "а" для женщин."""
+        return "" if self.is_male() else "а"
+
     def get_gender_display(self) -> str:
         """Возвращает читаемое представление гендера."""
         return "мужской" if self.is_male() else "женский"
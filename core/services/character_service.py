@@ -21,6 +21,23 @@ from core.models.treatment import TreatmentCourse
 
 logger = logging.getLogger(__name__)
 
+# Карта "день лечения -> персонаж" для основного диапазона курса:
+# строится один раз при импорте, горячий путь сводится к одному
+# обращению к словарю вместо цепочки сравнений диапазонов
+_CHARACTER_BY_DAY: Dict[int, BaseCharacter] = {}
+for _day in range(1, 26):
+    if _day <= 3:
+        _CHARACTER_BY_DAY[_day] = gaspode
+    elif _day <= 12:
+        _CHARACTER_BY_DAY[_day] = nobby_colon
+    elif _day <= 16:
+        _CHARACTER_BY_DAY[_day] = angua
+    elif _day <= 20:
+        _CHARACTER_BY_DAY[_day] = carrot
+    else:
+        _CHARACTER_BY_DAY[_day] = vimes
+del _day
+
 
 class CharacterService:
     """
@@ -57,21 +74,13 @@ class CharacterService:
         Returns:
             Экземпляр персонажа для данного дня
         """
-        if 1 <= day <= 3:
-            return gaspode
-        elif 4 <= day <= 12:
-            return nobby_colon
-        elif 13 <= day <= 16:
-            return angua
-        elif 17 <= day <= 20:
-            return carrot
-        elif 21 <= day <= 25:
-            return vimes
-        elif day >= 26:
+        character = _CHARACTER_BY_DAY.get(day)
+        if character is not None:
+            return character
+        if day >= 26:
             return vetinari
-        else:
-            logger.warning(f"Неверный день лечения: {day}, возвращаем Гаспода")
-            return gaspode
+        logger.warning(f"Неверный день лечения: {day}, возвращаем Гаспода")
+        return gaspode
     
     def get_character_by_name(self, name: str) -> Optional[BaseCharacter]:
         """
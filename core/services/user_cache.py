@@ -0,0 +1,86 @@
+"""
+Кэш пары "пользователь + активный курс" с коротким TTL.
+
+Почти каждый обработчик начинает с одних и тех же двух запросов:
+пользователь по telegram_id и его активный курс. Для частых команд
+подряд (например, /stats) это лишние обращения к базе - кэш отдаёт
+недавний результат из памяти и сам истекает через несколько секунд.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+from core.models.user import User
+from core.models.treatment import TreatmentCourse
+from database.repositories import UserRepository, TreatmentRepository
+
+logger = logging.getLogger(__name__)
+
+# Время жизни записи в секундах: достаточно короткое, чтобы изменения
+# курса (новая фаза, удаление) не жили в кэше заметное время
+_DEFAULT_TTL = 30.0
+
+# Модульные экземпляры репозиториев - как в обработчиках
+_user_repo = UserRepository()
+_treatment_repo = TreatmentRepository()
+
+
+class UserCache:
+    """
+    Кэш данных пользователя и его активного курса по telegram_id.
+
+    Хранит кортежи (момент записи, пользователь, курс) и отдаёт их,
+    пока не истёк TTL. Обработчики, меняющие данные (создание курса,
+    удаление пользователя), обязаны вызывать invalidate().
+    """
+
+    def __init__(self, ttl: float = _DEFAULT_TTL):
+        """
+        Инициализация кэша.
+
+        Args:
+            ttl: Время жизни записи в секундах
+        """
+        self.ttl = ttl
+        self._cache: dict = {}
+
+    async def get_user_and_course(self, telegram_id: int) -> Tuple[Optional[User], Optional[TreatmentCourse]]:
+        """
+        Возвращает пользователя и его активный курс, по возможности из кэша.
+
+        Args:
+            telegram_id: ID пользователя в Telegram
+
+        Returns:
+            Кортеж (пользователь или None, активный курс или None)
+        """
+        entry = self._cache.get(telegram_id)
+        if entry is not None:
+            cached_at, user_obj, course_obj = entry
+            if time.monotonic() - cached_at < self.ttl:
+                return user_obj, course_obj
+            del self._cache[telegram_id]
+
+        # Промах: пользователь ищется по telegram_id, курс - сразу
+        # по нему же через JOIN, оба запроса идут параллельно
+        user_obj, course_obj = await asyncio.gather(
+            _user_repo.get_by_telegram_id(telegram_id),
+            _treatment_repo.get_active_by_telegram_id(telegram_id)
+        )
+
+        self._cache[telegram_id] = (time.monotonic(), user_obj, course_obj)
+        return user_obj, course_obj
+
+    def invalidate(self, telegram_id: int) -> None:
+        """
+        Сбрасывает запись кэша для пользователя.
+
+        Args:
+            telegram_id: ID пользователя в Telegram
+        """
+        self._cache.pop(telegram_id, None)
+
+
+# Глобальный экземпляр кэша
+user_cache = UserCache()
@@ -64,6 +64,56 @@ class TabexRepository:
             logger.error(f"Ошибка создания записи приёма: {e}")
             raise
     
+    async def bulk_create_logs(self, logs: List[TabexLog]) -> int:
+        """
+        Создает несколько записей о приёме одной транзакцией.
+
+        Вставка выполняется через executemany: N записей - один
+        round-trip и один коммит вместо N отдельных.
+
+        Args:
+            logs: Список записей для создания
+
+        Returns:
+            int: Количество созданных записей
+        """
+        if not logs:
+            return 0
+
+        query = """
+            INSERT INTO tabex_logs (
+                course_id, scheduled_time, actual_time, status,
+                phase, character_response, created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+
+        now = datetime.now()
+        params = [
+            (
+                log.course_id,
+                log.scheduled_time.isoformat(),
+                log.actual_time.isoformat() if log.actual_time else None,
+                log.status,
+                log.phase,
+                log.character_response,
+                log.created_at or now
+            )
+            for log in logs
+        ]
+
+        try:
+            async with self.db.get_connection() as conn:
+                await conn.executemany(query, params)
+                await conn.commit()
+
+            logger.info(f"Создано {len(params)} записей о приёме одной транзакцией")
+            return len(params)
+
+        except Exception as e:
+            logger.error(f"Ошибка пакетного создания записей приёма: {e}")
+            raise
+
     async def get_log_by_id(self, log_id: int) -> Optional[TabexLog]:
         """
         Получает запись о приёме по ID.
@@ -108,6 +158,52 @@ class TabexRepository:
             logger.error(f"Ошибка получения записей для курса {course_id}: {e}")
             raise
     
+    async def get_stats_by_course_id(self, course_id: int) -> tuple:
+        """
+        Считает статистику приёма для курса прямо в SQL.
+
+        Вместо выгрузки всех записей курса в Python ради трёх чисел
+        агрегаты считает база - по проводу идёт одна строка.
+
+        Args:
+            course_id: ID курса лечения
+
+        Returns:
+            tuple: (принято, пропущено, время самой ранней дозы или None)
+        """
+        query = """
+            SELECT
+                SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as taken_count,
+                SUM(CASE WHEN status IN (?, ?) THEN 1 ELSE 0 END) as missed_count,
+                MIN(scheduled_time) as earliest_scheduled
+            FROM tabex_logs
+            WHERE course_id = ?
+        """
+        
+        params = (
+            TabexLogStatus.TAKEN.value,
+            TabexLogStatus.MISSED.value,
+            TabexLogStatus.SKIPPED.value,
+            course_id
+        )
+        
+        try:
+            row = await self.db.fetch_one(query, params)
+            
+            earliest = None
+            if row and row['earliest_scheduled']:
+                earliest = datetime.fromisoformat(row['earliest_scheduled'])
+            
+            return (
+                row['taken_count'] or 0 if row else 0,
+                row['missed_count'] or 0 if row else 0,
+                earliest
+            )
+            
+        except Exception as e:
+            logger.error(f"Ошибка подсчёта статистики для курса {course_id}: {e}")
+            raise
+    
     async def get_scheduled_logs(self, course_id: int) -> List[TabexLog]:
         """
         Получает запланированные приёмы для курса.
@@ -108,6 +108,35 @@ class TreatmentRepository:
             logger.error(f"Ошибка получения активного курса для пользователя {user_id}: {e}")
             raise
     
+    async def get_active_by_telegram_id(self, telegram_id: int) -> Optional[TreatmentCourse]:
+        """
+        Получает активный курс лечения по Telegram ID пользователя.
+
+        Объединяет поиск пользователя и курса в один SQL-запрос,
+        что избавляет обработчики от промежуточного запроса user_id.
+
+        Args:
+            telegram_id: ID пользователя в Telegram
+
+        Returns:
+            TreatmentCourse или None, если активный курс не найден
+        """
+        query = """
+            SELECT tc.* FROM treatment_courses tc
+            JOIN users u ON u.user_id = tc.user_id
+            WHERE u.telegram_id = ? AND tc.status = 'active'
+            ORDER BY tc.created_at DESC
+            LIMIT 1
+        """
+
+        try:
+            row = await self.db.fetch_one(query, (telegram_id,))
+            return self._row_to_treatment(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Ошибка получения активного курса по telegram_id {telegram_id}: {e}")
+            raise
+
     async def get_all_by_user_id(self, user_id: int) -> List[TreatmentCourse]:
         """
         Получает все курсы лечения пользователя.
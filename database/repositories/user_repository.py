@@ -9,6 +9,7 @@ from typing import Optional, List
 from datetime import datetime
 
 from core.models.user import User
+from core.models.treatment import TreatmentCourse
 from database.connection import get_db
 
 logger = logging.getLogger(__name__)
@@ -69,6 +70,75 @@ class UserRepository:
             logger.error(f"Ошибка создания пользователя: {e}")
             raise
     
+    async def create_with_course(self, user: User, course: TreatmentCourse) -> tuple:
+        """
+        Создает пользователя и его курс лечения одной транзакцией.
+
+        Две отдельные вставки - это два подключения и два commit'а;
+        здесь обе записи фиксируются одним commit'ом, и при ошибке
+        на второй вставке пользователь-сирота не остаётся в базе.
+
+        Args:
+            user: Объект пользователя для создания
+            course: Курс лечения (user_id проставляется автоматически)
+
+        Returns:
+            tuple: (созданный пользователь, созданный курс) с ID
+
+        Raises:
+            ValueError: Если пользователь с таким telegram_id уже существует
+        """
+        existing = await self.get_by_telegram_id(user.telegram_id)
+        if existing:
+            raise ValueError(f"Пользователь с telegram_id {user.telegram_id} уже существует")
+
+        user_query = """
+            INSERT INTO users (telegram_id, first_name, username, gender, timezone, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        course_query = """
+            INSERT INTO treatment_courses (
+                user_id, start_date, current_phase, current_character,
+                status, smoking_quit_date, created_at, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+
+        try:
+            async with self.db.get_connection() as conn:
+                cursor = await conn.execute(user_query, (
+                    user.telegram_id,
+                    user.first_name,
+                    user.username,
+                    user.gender,
+                    user.timezone,
+                    user.created_at or datetime.now(),
+                    user.updated_at or datetime.now()
+                ))
+                user.user_id = cursor.lastrowid
+
+                course.user_id = user.user_id
+                cursor = await conn.execute(course_query, (
+                    course.user_id,
+                    course.start_date.isoformat(),
+                    course.current_phase,
+                    course.current_character,
+                    course.status,
+                    course.smoking_quit_date.isoformat() if course.smoking_quit_date else None,
+                    course.created_at or datetime.now(),
+                    course.updated_at or datetime.now()
+                ))
+                course.course_id = cursor.lastrowid
+
+                await conn.commit()
+
+            logger.info(f"Создан пользователь с курсом: {user}")
+            return user, course
+
+        except Exception as e:
+            logger.error(f"Ошибка создания пользователя с курсом: {e}")
+            raise
+
     async def get_by_id(self, user_id: int) -> Optional[User]:
         """
         Получает пользователя по внутреннему ID.
@@ -185,6 +255,58 @@ class UserRepository:
             logger.error(f"Ошибка удаления пользователя {user_id}: {e}")
             raise
     
+    async def cascade_delete(self, user_id: int) -> bool:
+        """
+        Удаляет пользователя со всеми зависимыми данными одной транзакцией.
+
+        Четыре отдельных DELETE - это четыре подключения и четыре
+        commit'а, а сбой посередине оставляет базу в полуудалённом
+        состоянии. Здесь все удаления идут на одном соединении в порядке
+        зависимостей и фиксируются одним commit'ом.
+
+        Args:
+            user_id: ID пользователя для удаления
+
+        Returns:
+            bool: True, если пользователь был удален
+        """
+        logs_query = """
+            DELETE FROM tabex_logs 
+            WHERE course_id IN (
+                SELECT course_id FROM treatment_courses WHERE user_id = ?
+            )
+        """
+        interactions_query = """
+            DELETE FROM character_interactions 
+            WHERE course_id IN (
+                SELECT course_id FROM treatment_courses WHERE user_id = ?
+            )
+        """
+        courses_query = "DELETE FROM treatment_courses WHERE user_id = ?"
+        user_query = "DELETE FROM users WHERE user_id = ?"
+        
+        try:
+            async with self.db.get_connection() as conn:
+                # От зависимых таблиц к независимым
+                await conn.execute(logs_query, (user_id,))
+                await conn.execute(interactions_query, (user_id,))
+                await conn.execute(courses_query, (user_id,))
+                cursor = await conn.execute(user_query, (user_id,))
+                rows_affected = cursor.rowcount
+                await conn.commit()
+            
+            success = rows_affected > 0
+            if success:
+                logger.info(f"Удален пользователь {user_id} со всеми данными")
+            else:
+                logger.warning(f"Пользователь {user_id} не найден для каскадного удаления")
+            
+            return success
+            
+        except Exception as e:
+            logger.error(f"Ошибка каскадного удаления пользователя {user_id}: {e}")
+            raise
+    
     async def get_all(self) -> List[User]:
         """
         Получает список всех пользователей.